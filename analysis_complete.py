@@ -1,6 +1,7 @@
 import os
 
-everything = ("AND", "AND-CSE".upper(), "OR".upper(), "OR-CSE".upper(), "ROR".upper(), "Alpha", "Alpha-m", "Harvey", "Partial-lex", "None")
+everything = ("AND", "AND-CSE".upper(), "OR".upper(), "OR-CSE".upper(), "ROR".upper(), "Alpha", "Alpha-m", "Harvey",
+              "AND-CSE-PG", "OR-CSE-PG", "ROR-PG", "Alpha-m-pg", "Harvey-pg", "Partial-lex", "None")
 
 
 def main():
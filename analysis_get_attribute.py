@@ -1,7 +1,8 @@
 import os
 import sys
 
-everything = ("and", "and-cse", "or", "or-cse", "ror", "alpha", "alpha-m", "harvey", "mylex", "none")
+everything = ("and", "and-cse", "or", "or-cse", "ror", "alpha", "alpha-m", "harvey",
+              "and-cse-pg", "or-cse-pg", "ror-pg", "alpha-m-pg", "harvey-pg", "mylex", "none")
 attributes = ['bool2cnf', 'clauses', 'conflicts', 'decisions', 'get_lex', 'propagations', 'rnd_decisions', 'solves', 'solving', 'starts', 'total']
 
 
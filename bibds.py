@@ -3,19 +3,77 @@
 import atexit
 import signal
 import sys
+import time
 import lexleader
 import os
 import itertools
+import tempfile
+import multiprocessing
+import queue
+import socket
+import threading
+from subprocess import Popen, DEVNULL, TimeoutExpired
 import utils
+import cnfpool
+import lexcache
+from formula import ClauseBuffer
 import argparse
-from subprocess import Popen, PIPE
+from array import array
 from pyminisolvers import minisolvers
 
 
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument('--instance', type=str, default=None)
-    parser.add_argument('--option', type=str, default=None)
+    parser.add_argument('--option', type=str, default=None,
+                        help="lex-leader encoding, or a length-threshold policy "
+                             "such as ror:20:alpha-m (ror below length 20, "
+                             "alpha-m from there); lazy-<encoding> adds each "
+                             "constraint only once a model violates it; auto "
+                             "probes the cheapest encodings on the instance "
+                             "and uses the fastest")
+    parser.add_argument('--row-option', type=str, default=None,
+                        help="encoding or policy of the row constraints "
+                             "(default: the same as --option)")
+    parser.add_argument('--window', type=int, default=1,
+                        help="compare each row/column with this many preceding "
+                             "ones, 0 for all (default: 1, adjacent pairs)")
+    parser.add_argument('--first-k', type=int, default=None, metavar='K',
+                        help="only compare the first K positions of each pair")
+    parser.add_argument('--portfolio', type=str, default=None, metavar='OPTIONS',
+                        help="comma-separated lex-leader options to race in "
+                             "separate processes; the first to finish gives "
+                             "the output and the others are stopped")
+    parser.add_argument('--threads', action='store_true',
+                        help="race the --portfolio options in threads of this "
+                             "process instead, one design at a time: each "
+                             "design is taken from the first solver to find "
+                             "one and blocked in all of them")
+    parser.add_argument('--workers', type=int, default=0, metavar='N',
+                        help="enumerate in N worker processes, each taking "
+                             "cubes (partial assignments of the first rows) "
+                             "from a shared queue (default: 0, no workers)")
+    parser.add_argument('--cube-budget', type=int, default=1000, metavar='N',
+                        help="designs a worker enumerates in a cube before it "
+                             "splits the rest of the cube (default: 1000)")
+    parser.add_argument('--auto-candidates', type=int, default=4, metavar='N',
+                        help="number of encodings --option auto probes (default: 4)")
+    parser.add_argument('--probe-conflicts', type=int, default=2000, metavar='N',
+                        help="conflicts after which an --option auto probe "
+                             "stops (default: 2000)")
+    parser.add_argument('--stream', action='store_true',
+                        help="generate and load the lex-leader constraints "
+                             "one vector pair at a time")
+    parser.add_argument('--cnf', type=str, default='bool2cnf',
+                        choices=['bool2cnf', 'clauses', 'tseitin', 'pg'],
+                        help="how the lex-leader constraints become clauses: "
+                             "the bool2cnf binary, hand-written clauses, "
+                             "or in-process Tseitin / Plaisted-Greenbaum "
+                             "conversion of the formula")
+    parser.add_argument('--cache', type=str, default=None, metavar='DIR',
+                        help="reuse converted lex-leader constraints stored in DIR")
+    parser.add_argument('--cache-size', type=int, default=1024, metavar='MB',
+                        help="size bound of the --cache directory (default: 1024)")
 
     parser.add_argument('-v', '--verbose', action='count', default=0,
                         help="print the actual designs")
@@ -24,43 +82,172 @@ def parse_args():
     parser.add_argument('-l', '--limit', type=int, default=None,
                         help="limit number of design outputs")
     args = parser.parse_args()
+    if args.first_k is not None and args.first_k < 1:
+        parser.error("--first-k must be at least 1")
+    if args.window < 0:
+        parser.error("--window must be at least 0")
     return args
 
 
-def parse_dimacs(f):
+def parse_dimacs(f, clauses):
+    """ append the clauses of a DIMACS text to a ClauseBuffer;
+        returns the number of variables
+    """
     i = 0
     for line in f:
         if line.startswith('p'):
             tokens = line.split()
             nvars = int(tokens[2])
             nclauses = int(tokens[3])
-
-            while solver.nvars() < nvars:
-                solver.new_var(polarity=False)
             continue  # skip parsing the first line
-        if line == "":
+        if line.strip() == "":
             continue  # skip parsing the last line
         lits = line.split()
 
-        clause = [int(x) for x in lits[:-1]]
-        solver.add_clause(clause)
+        clauses.add(*[int(x) for x in lits[:-1]])
 
         i += 1
     assert i == nclauses
+    return nvars
+
+
+def load_clauses(clauses, nvars):
+    """ load a ClauseBuffer whose variables are already in solver numbering """
+    while solver.nvars() < nvars:
+        solver.new_var(polarity=False)
+    solver.add_clauses(clauses.lits, clauses.offsets)
+
+
+def bool2cnf_clauses(formula, num_vars=0):
+    """ convert a formula with bool2cnf; formula is either one string or an
+        iterable of constraint strings (joined with "\n&"), streamed to
+        bool2cnf, whose output is parsed as it is read; bool2cnf renumbers
+        only the variables the formula mentions, so matrix variables
+        1..num_vars it leaves out (e.g. past --first-k) are given fresh
+        solver variables
+        returns:
+            (clauses, nvars, var2realvar)
+    """
+    if not isinstance(formula, str):
+        formula = join_constraints(formula)
+    lines = cnfpool.convert_lines(formula)
+    varmap_lines = []
+    for line in lines:
+        if line.startswith('p'):
+            break
+        varmap_lines.append(line)
+    var2realvar = parse_varmap(varmap_lines)
+    clauses = ClauseBuffer()
+    nvars = parse_dimacs(itertools.chain([line], lines), clauses)
+    for v in range(1, num_vars+1):
+        if v not in var2realvar:
+            nvars += 1
+            var2realvar[v] = nvars
+    return clauses, nvars, var2realvar
+
+
+def call_bool2cnf(formula, num_vars=0):
+    """ convert a formula with bool2cnf and load the result into the solver """
+    clauses, nvars, var2realvar = bool2cnf_clauses(formula, num_vars)
+    load_clauses(clauses, nvars)
+    return var2realvar
 
 
-def call_bool2cnf(formula):
-    pathtofile = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'bool2cnf')
-    p = Popen([pathtofile, '-s'], stdout=PIPE, stdin=PIPE)
-    stdout, _ = p.communicate(input=formula.encode('utf-8'))
-    try:
-        tmp_map, cnf = stdout.decode("utf-8").split('p')
-        #print(tmp_map, cnf)
-    except Exception as e:
-        raise e
-    var2realvar = parse_varmap(tmp_map.split('\n'))
-    parse_dimacs(('p'+cnf).split('\n'))
-    return var2realvar
+def make_lex(args, num_class, num_v, option):
+    """ the LexLeader of the num_class x num_v matrix, set up from the
+        command line arguments
+    """
+    return lexleader.LexLeader(num_class, num_v, option, row_option=args.row_option,
+                               window=args.window or None, first_k=args.first_k)
+
+
+def build_solver(args, n, k, l, num_class, option, cnf="clauses"):
+    """ a new solver, made the global one, holding the design and the
+        lex-leader constraints of the given option converted by the given
+        --cnf method (or posted natively); the matrix variables are those of
+        make_matrixvar()
+        returns:
+            (solver, var2realvar)
+    """
+    global solver
+    solver = minisolvers.MinicardSolver()
+    matrix2var = make_matrixvar(num_class, n)
+    var2realvar = {i: i for i in range(1, num_class*n+1)}
+    lex = make_lex(args, num_class, n, option)
+    if cnf != "bool2cnf" or option == "native":
+        while solver.nvars() < num_class*n:
+            solver.new_var()
+    if option == "native":
+        lex.post_lexleader(solver)
+    else:
+        lex_clauses, nvars, var2realvar = encode_lex(lex, cnf)
+        load_clauses(lex_clauses, nvars)
+    make_bibd(n, k, l, num_class, matrix2var, var2realvar)
+    return solver, var2realvar
+
+
+def probe_option(args, n, k, l, num_class, option):
+    """ enumerate designs with the given lex-leader option until the solver
+        has spent args.probe_conflicts conflicts or the designs run out
+        returns:
+            the seconds spent, encoding included
+    """
+    start = time.perf_counter()
+    _, var2realvar = build_solver(args, n, k, l, num_class, option, args.cnf)
+    matrix2var = make_matrixvar(num_class, n)
+    model = array('i', bytes(4 * max(var2realvar.values())))
+    while True:
+        budget = args.probe_conflicts - solver.get_stats()["conflicts"]
+        if budget <= 0 or not solver.solve(conflict_budget=budget):
+            break
+        block_model(solver.get_model(0, len(model), out=model), matrix2var, var2realvar)
+    return time.perf_counter() - start
+
+
+def choose_option(args, n, k, l, num_class):
+    """ the fastest of the cheapest --auto-candidates encodings, judged by
+        a short probe of each on the instance with the --cnf conversion;
+        with a --row-option, only the column encoding is chosen, and native
+        (which cannot share the matrix with another encoding) is left out
+    """
+    # the vectors the chosen option is used for
+    lex = lexleader.LexLeader(num_class, n, "native", rows_enabled=(args.row_option is None),
+                              window=args.window or None, first_k=args.first_k)
+    lengths = [len(vector1) for vector1, _, _ in lex.encoded_pairs()]
+    candidates = [option for option in lexleader.cheapest_encoders(lengths)
+                  if option != "native" or args.row_option is None]
+    timings = dict()
+    for option in candidates[:args.auto_candidates]:
+        timings[option] = probe_option(args, n, k, l, num_class, option)
+        sys.stderr.write("probe {}: {:.3f}s\n".format(option, timings[option]))
+    return min(timings, key=timings.get)
+
+
+def encode_lex(lex, cnf):
+    """ the lex-leader constraints of lex converted by the given --cnf method
+        returns:
+            (clauses, nvars, var2realvar)
+    """
+    if cnf == "bool2cnf":
+        return bool2cnf_clauses(lex.make_lexleader(), lex.num_columns*lex.num_rows)
+    if cnf == "clauses":
+        clauses = lex.make_lexleader_clauses()
+    else:
+        clauses = lex.make_lexleader_tseitin(pg=(cnf == "pg"))
+    var2realvar = {i: i for i in range(1, lex.num_columns*lex.num_rows+1)}
+    return clauses, lex.num_var, var2realvar
+
+
+def lazy_cnf(cnf):
+    """ the in-process conversion used for lazily added constraints; the
+        bool2cnf binary is not run per pair, so it falls back to clauses
+    """
+    return "clauses" if cnf == "bool2cnf" else cnf
+
+
+def join_constraints(constraints):
+    for i, constraint in enumerate(constraints):
+        yield constraint if i == 0 else "\n& " + constraint
 
 
 def parse_varmap(inlist):
@@ -86,32 +273,43 @@ def make_bibd(n, k, l, num_class, matrix2var, var2realvar):
             edgemap[(c,v1,v2)] = i
             solver.new_var(dvar=False)
 
+    clauses = ClauseBuffer()
     for c in range(num_class):
         for (u, v) in e_all:
-            solver.add_clause([-var2realvar[matrix2var[(c,v)]], -var2realvar[matrix2var[(c,u)]], edgemap[(c,u,v)]])
-            solver.add_clause([var2realvar[matrix2var[(c,u)]], -edgemap[(c,u,v)]])
-            solver.add_clause([var2realvar[matrix2var[(c,v)]], -edgemap[(c,u,v)]])
+            clauses.add(-var2realvar[matrix2var[(c,v)]], -var2realvar[matrix2var[(c,u)]], edgemap[(c,u,v)])
+            clauses.add(var2realvar[matrix2var[(c,u)]], -edgemap[(c,u,v)])
+            clauses.add(var2realvar[matrix2var[(c,v)]], -edgemap[(c,u,v)])
+    solver.add_clauses(clauses.lits, clauses.offsets)
+
+    # exactly-bound constraints, as an AtMost on the literals and one on
+    # their negations: sum(lits) <= bound and sum(-lits) <= len(lits) - bound
+    atmosts = ClauseBuffer()
+    bounds = array("i")
+
+    def exactly(lits, bound):
+        atmosts.add(*lits)
+        bounds.append(bound)
+        atmosts.add(*[-x for x in lits])
+        bounds.append(len(lits) - bound)
 
     for (v1, v2) in e_all:
         same_edges = []
         for c in range(num_class):
             same_edges.append(edgemap[(c,v1,v2)])
-        solver.add_atleast(same_edges, l)
-        solver.add_atmost(same_edges, l)
+        exactly(same_edges, l)
 
     for v in range(n):
         same_vertices = []
         for c in range(num_class):
             same_vertices.append(var2realvar[matrix2var[(c,v)]])
-        solver.add_atmost(same_vertices, r)
-        solver.add_atleast(same_vertices, r)
+        exactly(same_vertices, r)
 
     for c in range(num_class):
         vertices = []
         for v in range(n):
             vertices.append(var2realvar[matrix2var[(c,v)]])
-        solver.add_atmost(vertices, k)
-        solver.add_atleast(vertices, k)
+        exactly(vertices, k)
+    solver.add_atmosts(atmosts.lits, atmosts.offsets, bounds)
 
 
 def make_mylex(num_class, num_v, matrix2var, full=False):
@@ -163,6 +361,182 @@ def print_model(lits, num_v, num_class, matrix2var, var2realvar):
     print("")
 
 
+def interrupt_on_signal():
+    """ interrupt the solver as soon as a signal with a Python handler
+        arrives; the handler itself only runs in the main thread once its
+        solver call has returned
+    """
+    reader, writer = socket.socketpair()
+    writer.setblocking(False)
+    signal.set_wakeup_fd(writer.fileno())
+
+    def watch(reader, writer):
+        while reader.recv(1):
+            solver.interrupt()
+    threading.Thread(target=watch, args=(reader, writer), daemon=True).start()
+
+
+def enumerate_designs(args, s, num_v, num_class, matrix2var, var2realvar):
+    """ enumerate the designs inside the solver, blocking each one on the
+        matrix variables; the batches grow from a single design, so the
+        first designs are still reported as soon as they are found
+    """
+    projection = [var2realvar[v] for v in matrix2var.values()]
+    stride = (len(projection) + 7) // 8
+    identity = {v: v for v in matrix2var.values()}
+    count = 0
+    batch = 1
+    while True:
+        want = batch if args.limit == float("inf") else min(batch, args.limit - count)
+        with s.time("solving"):
+            models = b"".join(solver.enumerate(projection, limit=want, batch=want))
+        for values in solver.unpack_models(models, len(projection)):
+            count += 1
+            print(count, round(s.total_time(),3))
+            if args.verbose == 1:
+                # values[i] is the value of matrix variable i+1
+                print_model([int(x) for x in values], num_v, num_class, matrix2var, identity)
+            if count == args.limit:
+                sys.stderr.write("Result limit reached.\n")
+                sys.exit(0)
+        if len(models) < want * stride:
+            print("UNSAT")
+            sys.exit(0)
+        batch = min(2 * batch, 1024)
+
+
+def make_cubes(order, count):
+    """ split the space into at least count cubes (lists of literals) over
+        the variables of order, taken in turn, dropping unsatisfiable cubes
+    """
+    cubes = [[]]
+    while 0 < len(cubes) < count and len(cubes[0]) < len(order):
+        cube = cubes.pop(0)
+        for lit in order[len(cube)], -order[len(cube)]:
+            if solver.solve(cube + [lit]):
+                cubes.append(cube + [lit])
+    return cubes
+
+
+def cube_worker(tasks, results, projection, order, budget):
+    """ enumerate the cubes of the task queue with this process' copy of the
+        solver; a task is (cube, designs already found in it), and each result
+        is (designs found, tasks for the rest of the cube if it was split)
+    """
+    # the copy of the parent's signal wakeup socket is not watched here
+    interrupt_on_signal()
+    # a worker told to stop has had all of its results read; one terminated
+    # must not wait at exit to flush them to a parent no longer reading
+    results.cancel_join_thread()
+    stride = (len(projection) + 7) // 8
+    position = {v: j for j, v in enumerate(projection)}
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        cube, known = task
+        blocking = ClauseBuffer()
+        for values in solver.unpack_models(known, len(projection)):
+            blocking.add(*[-v if value else v for v, value in zip(projection, values)])
+        solver.add_clauses(blocking.lits, blocking.offsets)
+        models = b"".join(solver.enumerate(projection, limit=budget, batch=budget, assumptions=cube))
+        if len(models) < budget * stride or len(cube) == len(order):
+            results.put((models, []))
+        else:
+            # unbalanced cube: hand the rest of it out in two halves, each
+            # carrying the designs found in it so far so they are not found again
+            var = order[len(cube)]
+            byte, bit = divmod(position[var], 8)
+            halves = ([], [])
+            known += models
+            for i in range(0, len(known), stride):
+                halves[not known[i+byte] >> bit & 1].append(known[i:i+stride])
+            results.put((models, [(cube + [var], b"".join(halves[0])), (cube + [-var], b"".join(halves[1]))]))
+
+
+# seconds a cube worker gets to exit after SIGTERM before it is killed; its
+# solver call is interrupted (see interrupt_on_signal()), so this is a last resort
+WORKER_GRACE = 5
+
+
+def enumerate_cubes(args, s, num_v, num_class, matrix2var, var2realvar):
+    """ enumerate the designs in args.workers forked worker processes (see
+        cube_worker()), starting from cubes over the first rows of the matrix
+        and re-splitting the cubes that take long; the designs are reported
+        in the order the workers finish their cubes
+    """
+    projection = [var2realvar[v] for v in matrix2var.values()]
+    identity = {v: v for v in matrix2var.values()}
+    # row by row, so the cubes fix the first rows of the matrix
+    order = [var2realvar[matrix2var[(c, r)]] for r in range(num_v) for c in range(num_class)]
+    with s.time("solving"):
+        cubes = make_cubes(order, 4 * args.workers)
+
+    context = multiprocessing.get_context("fork")
+    tasks = context.Queue()
+    results = context.Queue()
+    # daemons, so no exit path waits for a worker still blocked on the queue
+    workers = [context.Process(target=cube_worker, args=(tasks, results, projection, order, max(2, args.cube_budget)), daemon=True)
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+
+    def stop():
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join(WORKER_GRACE)
+            if worker.exitcode is None:
+                worker.kill()
+                worker.join()
+        # nobody reads the queued cubes any more, don't wait to flush them at exit
+        tasks.cancel_join_thread()
+
+    try:
+        for cube in cubes:
+            tasks.put((cube, b""))
+        pending = len(cubes)
+        count = 0
+        while pending > 0:
+            with s.time("solving"):
+                models, split = next_result(results, workers)
+            pending -= 1
+            for task in split:
+                tasks.put(task)
+                pending += 1
+            for values in solver.unpack_models(models, len(projection)):
+                count += 1
+                print(count, round(s.total_time(),3))
+                if args.verbose == 1:
+                    print_model([int(x) for x in values], num_v, num_class, matrix2var, identity)
+                if count == args.limit:
+                    sys.stderr.write("Result limit reached.\n")
+                    sys.exit(0)
+        for worker in workers:
+            tasks.put(None)
+        for worker in workers:
+            worker.join()
+    finally:
+        # also reached through the SIGTERM/SIGINT handler's sys.exit()
+        stop()
+    print("UNSAT")
+    sys.exit(0)
+
+
+def next_result(results, workers):
+    """ the next result of the cube workers, or exit if one of them died
+        (a worker only exits on its own once it is told to)
+    """
+    while True:
+        for worker in workers:
+            if worker.exitcode is not None:
+                sys.exit("cube worker died with exit code {}".format(worker.exitcode))
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            pass
+
+
 def block_model(model, matrix2var, var2realvar):
     lits = []
     for i in matrix2var.values():
@@ -186,8 +560,150 @@ def at_exit(stats_from, option):
     print(option+','+','.join(str(round(stats_to[k],3)) for k in keys))
 
 
+# seconds a losing --portfolio run gets to print its stats after SIGTERM
+# before it is killed; its solver call is interrupted (see interrupt_on_signal()),
+# so this is a last resort
+PORTFOLIO_GRACE = 5
+
+
+def run_portfolio(args):
+    """ run this script once per --portfolio option, all at the same time;
+        the output of the first run to finish is printed, the others are
+        terminated (killed if still running PORTFOLIO_GRACE seconds later),
+        and with -s the stats line of every run is printed (a run stopped
+        before its search started, or killed, has none).  All runs are
+        also stopped when this one is terminated or interrupted.
+    """
+    # the contestants get the same arguments, except for the option
+    argv = []
+    skip = False
+    for arg in sys.argv[1:]:
+        if skip:
+            skip = False
+        elif arg in ("--portfolio", "--option"):
+            skip = True
+        elif not arg.startswith(("--portfolio=", "--option=")):
+            argv.append(arg)
+
+    def handler(signum, frame):
+        sys.exit(128)
+    signal.signal(signal.SIGTERM, handler)
+    signal.signal(signal.SIGINT, handler)
+
+    def output(f):
+        f.seek(0)
+        return f.read().splitlines()
+
+    contestants = []
+    try:
+        for option in args.portfolio.split(","):
+            out = tempfile.TemporaryFile(mode="w+")
+            err = tempfile.TemporaryFile(mode="w+")
+            process = Popen([sys.executable, os.path.realpath(__file__), *argv, "--option", option, "-s"],
+                            stdin=DEVNULL, stdout=out, stderr=err)
+            contestants.append((option, process, out, err))
+
+        s = utils.Statistics()
+        winner = None
+        with s.time("portfolio"):
+            running = {contestant[1].pid: contestant for contestant in contestants}
+            while running and winner is None:
+                pid, status = os.wait()
+                if pid not in running:
+                    continue
+                contestant = running.pop(pid)
+                contestant[1].returncode = os.waitstatus_to_exitcode(status)
+                if contestant[1].returncode == 0:
+                    winner = contestant
+        for option, process, _, _ in contestants:
+            if process.returncode is None:
+                process.terminate()
+
+        if winner is None:
+            for option, process, _, err in contestants:
+                sys.stderr.write("{} failed with exit status {}:\n".format(option, process.returncode))
+                sys.stderr.write("".join(line + "\n" for line in output(err)))
+            sys.exit(1)
+
+        option, process, out, err = winner
+        # a finished run always ends with its stats line
+        for line in output(out)[:-1]:
+            print(line)
+        sys.stderr.write("".join(line + "\n" for line in output(err)))
+        sys.stderr.write("portfolio: {} finished first after {:.3f}s\n".format(option, s.get_times()["portfolio"]))
+        sys.stdout.flush()
+    finally:
+        # on every way out, signals included, no contestant is left running
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for option, process, _, _ in contestants:
+            if process.returncode is None:
+                process.terminate()
+        # the others all share one grace period
+        deadline = time.perf_counter() + PORTFOLIO_GRACE
+        for option, process, _, _ in contestants:
+            try:
+                process.wait(timeout=max(0, deadline - time.perf_counter()))
+            except TimeoutExpired:
+                process.kill()
+                process.wait()
+    if args.stats:
+        for option, process, out, _ in contestants:
+            lines = output(out)
+            if lines and lines[-1].startswith(option + ","):
+                print(lines[-1])
+    sys.exit(0)
+
+
+def run_thread_portfolio(args):
+    """ build one solver per --portfolio option and race them, in threads of
+        this process, for each design in turn; the first to find a design
+        gives the output, the others are interrupted, and the design is
+        blocked in all of them, as any lex-leader design is one under every
+        option.  The losers keep their learned clauses for the next race.
+    """
+    options = args.portfolio.split(",")
+    for option in options:
+        if option == "auto" or option.startswith("lazy-"):
+            sys.exit("--threads cannot race {}".format(option))
+    n, k, l = [int(i) for i in args.instance.split(',')]
+    num_class = l*n*(n-1)//(k*(k-1))
+    limit = float("inf") if args.limit is None else args.limit
+
+    start = time.perf_counter()
+    solvers = [build_solver(args, n, k, l, num_class, option)[0] for option in options]
+    matrix2var = make_matrixvar(num_class, n)
+    var2realvar = {i: i for i in range(1, num_class*n+1)}
+    model = array('i', bytes(4 * num_class*n))
+    wins = [0] * len(options)
+    count = 0
+    while count < limit:
+        winner, if_sat = minisolvers.race(solvers)
+        if not if_sat:
+            print("UNSAT")
+            break
+        wins[winner] += 1
+        solvers[winner].get_model(0, len(model), out=model)
+        block = [-v if model[v-1] else v for v in matrix2var.values()]
+        for each in solvers:
+            each.add_clause(block)
+        count += 1
+        print(count, round(time.perf_counter() - start, 3))
+        if args.verbose == 1:
+            print_model(model, n, num_class, matrix2var, var2realvar)
+    else:
+        sys.stderr.write("Result limit reached.\n")
+    sys.stderr.write("portfolio: {}\n".format(", ".join(
+        "{} found {}".format(option, wins[i]) for i, option in enumerate(options))))
+    sys.exit(0)
+
+
 def main():
     args = parse_args()
+    if args.portfolio is not None:
+        if args.threads:
+            run_thread_portfolio(args)
+        run_portfolio(args)
     s = utils.Statistics()
     n, k, l = [int(i) for i in args.instance.split(',')]
     if args.limit is None:
@@ -197,6 +713,9 @@ def main():
     assert num_class == int(num_class)
     num_class = int(num_class)
     global solver
+    if lex_option == "auto":
+        lex_option = choose_option(args, n, k, l, num_class)
+        sys.stderr.write("auto: using {}\n".format(lex_option))
     solver = minisolvers.MinicardSolver()
     matrix2var = make_matrixvar(num_class, n)
 
@@ -218,12 +737,79 @@ def main():
         with s.time("bool2cnf"):
             pass
 
+    elif lex_option == "native":
+        # one native lex constraint per vector pair, no auxiliary variables
+        var2realvar = {i: i for i in range(1, num_class*n+1)}
+        while solver.nvars() < num_class*n:
+            solver.new_var()
+        with s.time("get_lex"):
+            lex = make_lex(args, num_class, n, lex_option)
+        with s.time("bool2cnf"):
+            lex.post_lexleader(solver)
+
+    elif lex_option.startswith("lazy-"):
+        # the lex-leader constraints are added on demand, only for the
+        # vector pairs a model violates (see the enumeration loop below)
+        if lex_option == "lazy-native":
+            sys.exit("lazy-native: native constraints cannot be added lazily")
+        var2realvar = {i: i for i in range(1, num_class*n+1)}
+        while solver.nvars() < num_class*n:
+            solver.new_var()
+        lex = make_lex(args, num_class, n, lex_option[len("lazy-"):])
+        with s.time("get_lex"):
+            pass
+        with s.time("bool2cnf"):
+            pass
+
+    elif args.cache is not None:
+        cache = lexcache.LexCache(args.cache, args.cache_size << 20)
+        with s.time("get_lex"):
+            # on a miss, encoding and conversion are both timed here
+            key = (num_class, n, lex_option, args.row_option, args.window, args.first_k, args.cnf)
+            entry = cache.get(key)
+            if entry is None:
+                lex = make_lex(args, num_class, n, lex_option)
+                entry = encode_lex(lex, args.cnf)
+                cache.put(key, *entry)
+        with s.time("bool2cnf"):
+            lex_clauses, nvars, var2realvar = entry
+            load_clauses(lex_clauses, nvars)
+
+    elif args.stream:
+        # generation is interleaved with conversion and loading, so all of
+        # it is timed as "bool2cnf"
+        lex = make_lex(args, num_class, n, lex_option)
+        with s.time("get_lex"):
+            pass
+        with s.time("bool2cnf"):
+            if args.cnf == "bool2cnf":
+                var2realvar = call_bool2cnf(lex.iter_lexleader(), num_class*n)
+            else:
+                if args.cnf == "clauses":
+                    pieces = lex.iter_lexleader_clauses()
+                else:
+                    pieces = lex.iter_lexleader_tseitin(pg=(args.cnf == "pg"))
+                for lex_clauses in pieces:
+                    load_clauses(lex_clauses, lex.num_var)
+                var2realvar = {i: i for i in range(1, num_class*n+1)}
+
+    elif args.cnf in ("clauses", "tseitin", "pg"):
+        lex = make_lex(args, num_class, n, lex_option)
+        with s.time("get_lex"):
+            if args.cnf == "clauses":
+                lex_clauses = lex.make_lexleader_clauses()
+            else:
+                lex_clauses = lex.make_lexleader_tseitin(pg=(args.cnf == "pg"))
+        with s.time("bool2cnf"):
+            load_clauses(lex_clauses, lex.num_var)
+        var2realvar = {i: i for i in range(1, num_class*n+1)}
+
     else:
-        lex = lexleader.LexLeader(num_class, n, lex_option)
+        lex = make_lex(args, num_class, n, lex_option)
         with s.time("get_lex"):
             lex_constraints = lex.make_lexleader()
         with s.time("bool2cnf"):
-            var2realvar = call_bool2cnf(lex_constraints)
+            var2realvar = call_bool2cnf(lex_constraints, num_class*n)
 
     make_bibd(n, k, l, num_class, matrix2var, var2realvar)
 
@@ -234,13 +820,31 @@ def main():
         sys.exit(128)  # atexit should fire here
     signal.signal(signal.SIGTERM, handler)  # external termination
     signal.signal(signal.SIGINT, handler)   # CTL-C interrupts
+    interrupt_on_signal()
+
+    if not lex_option.startswith("lazy-"):
+        if args.workers > 0:
+            enumerate_cubes(args, s, n, num_class, matrix2var, var2realvar)
+        enumerate_designs(args, s, n, num_class, matrix2var, var2realvar)
 
+    # only the matrix variables are read, into one buffer reused for every model
+    model = array('i', bytes(4 * max(var2realvar[i] for i in matrix2var.values())))
     count = 0
     while True:
         with s.time("solving"):
             if_sat = solver.solve()
         if if_sat:
-            model = list(solver.get_model())
+            solver.get_model(0, len(model), out=model)
+            if lex_option.startswith("lazy-"):
+                violated = lex.violated_pairs(model)
+                if violated:
+                    # not a lex-leader: add the broken constraints and retry
+                    with s.time("bool2cnf"):
+                        lex.num_var = solver.nvars()
+                        for vector1, vector2, option in violated:
+                            lex_clauses = lex.make_pair_clauses(vector1, vector2, lazy_cnf(args.cnf), option)
+                            load_clauses(lex_clauses, lex.num_var)
+                    continue
             block_model(model, matrix2var, var2realvar)
             count += 1
             args.limit -= 1
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""A pool of long-lived bool2cnf conversion workers.
+
+Each worker is a Python process that stays alive for the lifetime of the
+pool and talks to it over stdin/stdout with length-delimited frames (a
+4-byte big-endian length followed by that many bytes).  A request is one
+frame holding the number of formulas N, then for every formula any number
+of non-empty text frames closed by an empty frame.  The response is N
+frames, each holding the bool2cnf -s output for one formula.
+
+The bool2cnf binary reads its input to EOF and converts a single formula,
+so a worker converts a whole batch with one run of it: every formula's
+variables are shifted into a disjoint range, the shifted formulas are
+conjoined, and the resulting CNF is split back into one CNF per formula.
+A single formula gains nothing from that, so it is converted by a run of
+the binary in the calling process instead (see convert_lines()).
+"""
+import atexit
+import bisect
+import os
+import re
+import struct
+import sys
+from subprocess import Popen, PIPE
+
+_LENGTH = struct.Struct(">I")
+_VARIABLE = re.compile(r"x(\d+)")
+_BOOL2CNF = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'bool2cnf')
+
+
+def write_frame(stream, payload):
+    stream.write(_LENGTH.pack(len(payload)))
+    stream.write(payload)
+
+
+def read_frame(stream):
+    header = stream.read(_LENGTH.size)
+    if len(header) < _LENGTH.size:
+        raise EOFError("conversion stream closed")
+    (length,) = _LENGTH.unpack(header)
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise EOFError("conversion stream closed")
+    return payload
+
+
+class Bool2CnfPool:
+    """ a fixed set of conversion workers; formulas are spread over the
+        workers in contiguous batches
+    """
+    def __init__(self, workers=1):
+        self.workers = []
+        for _ in range(workers):
+            self.workers.append(Popen([sys.executable, os.path.realpath(__file__)],
+                                      stdin=PIPE, stdout=PIPE))
+
+    def convert(self, formula):
+        """ convert one formula (a string or an iterable of strings) and
+            return the bool2cnf -s output as text
+        """
+        return "".join(convert_lines(formula))
+
+    def convert_many(self, formulas):
+        """ convert a sequence of formulas, each a string or an iterable of
+            strings to be concatenated, and return a list of bool2cnf -s
+            outputs in the same order
+        """
+        formulas = list(formulas)
+        if len(formulas) == 1:
+            return [self.convert(formulas[0])]
+        size = -(-len(formulas) // len(self.workers))
+        batches = [formulas[i:i+size] for i in range(0, len(formulas), size)]
+
+        # every worker reads its whole request before it answers, so all
+        # requests can be sent before any response is read
+        for worker, batch in zip(self.workers, batches):
+            write_frame(worker.stdin, str(len(batch)).encode("ascii"))
+            for formula in batch:
+                if isinstance(formula, str):
+                    formula = [formula]
+                for chunk in formula:
+                    if chunk:
+                        write_frame(worker.stdin, chunk.encode("utf-8"))
+                write_frame(worker.stdin, b"")
+            worker.stdin.flush()
+
+        results = []
+        for worker, batch in zip(self.workers, batches):
+            for _ in batch:
+                results.append(read_frame(worker.stdout).decode("utf-8"))
+        return results
+
+    def close(self):
+        for worker in self.workers:
+            worker.stdin.close()
+        for worker in self.workers:
+            worker.wait()
+        self.workers = []
+
+
+_default_pool = None
+
+
+def default_pool():
+    """ the per-process pool used by bibds.py and run_tests.py """
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = Bool2CnfPool()
+        atexit.register(_default_pool.close)
+    return _default_pool
+
+
+def convert_lines(formula):
+    """ convert one formula (a string or an iterable of strings, written to
+        bool2cnf as they are produced) with a run of the bool2cnf binary in
+        this process, and yield the lines of its -s output as they are read
+    """
+    p = Popen([_BOOL2CNF, '-s'], stdout=PIPE, stdin=PIPE)
+    if isinstance(formula, str):
+        formula = [formula]
+    for chunk in formula:
+        if chunk:
+            p.stdin.write(chunk.encode("utf-8"))
+    p.stdin.close()
+    try:
+        for line in p.stdout:
+            yield line.decode("utf-8")
+    finally:
+        p.stdout.close()
+        p.wait()
+
+
+def split_cnf(output, owners):
+    """ split the bool2cnf -s output of a conjunction of variable-disjoint
+        formulas into one output per formula
+        inputs:
+            output: the lines of bool2cnf -s output of the whole conjunction
+            owners: sorted list of the first (shifted) variable number of
+                    each formula
+        returns:
+            list of bool2cnf -s style outputs, one per formula, each
+            numbered from 1 and naming that formula's unshifted variables
+    """
+    name2var = dict()
+    clauses = []
+    for line in output:
+        if line.startswith('c'):
+            tokens = line.split()
+            name2var[int(tokens[-2][1:])] = int(tokens[-1])
+        elif line.startswith('p') or line.strip() == "":
+            continue
+        else:
+            clauses.append([int(x) for x in line.split()[:-1]])
+
+    # unit propagation through binary clauses (-t, x) turns the conjunction
+    # structure above the formulas into units, which disconnects them
+    implied = dict()
+    units = []
+    rest = []
+    for clause in clauses:
+        if len(clause) == 1:
+            units.append(clause[0])
+        elif len(clause) == 2 and (clause[0] < 0 or clause[1] < 0):
+            t, x = (clause[0], clause[1]) if clause[0] < 0 else (clause[1], clause[0])
+            implied.setdefault(-t, []).append((x, clause))
+        else:
+            rest.append(clause)
+    asserted = set()
+    stack = list(units)
+    while stack:
+        lit = stack.pop()
+        if lit in asserted:
+            continue
+        asserted.add(lit)
+        for x, _ in implied.pop(lit, ()):
+            stack.append(x)
+    for pairs in implied.values():
+        rest.extend(clause for _, clause in pairs)
+    rest.extend([lit] for lit in asserted)
+
+    parent = dict()
+
+    def find(v):
+        root = v
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[v] != root:
+            parent[v], v = root, parent[v]
+        return root
+
+    for clause in rest:
+        first = find(abs(clause[0]))
+        for lit in clause[1:]:
+            other = find(abs(lit))
+            if other != first:
+                parent[other] = first
+
+    owner_of_root = dict()
+    names = [[] for _ in owners]
+    for name, var in name2var.items():
+        index = bisect.bisect_right(owners, name) - 1
+        owner_of_root.setdefault(find(var), index)
+        names[index].append((name, var))
+    parts = [[] for _ in owners]
+    for clause in rest:
+        root = find(abs(clause[0]))
+        if root in owner_of_root:
+            parts[owner_of_root[root]].append(clause)
+        elif len(clause) > 1:
+            # only the units of the joining conjunction itself have no owner
+            raise ValueError("clause {} belongs to no formula".format(clause))
+
+    outputs = []
+    for i, part in enumerate(parts):
+        renumber = dict()
+        lines = []
+        for name, var in sorted(names[i]):
+            renumber[var] = len(renumber) + 1
+            lines.append("c var x{} {}".format(name - owners[i] + 1, renumber[var]))
+        for clause in part:
+            for lit in clause:
+                if abs(lit) not in renumber:
+                    renumber[abs(lit)] = len(renumber) + 1
+        lines.append("p cnf {} {}".format(len(renumber), len(part)))
+        for clause in part:
+            lines.append(" ".join(str(renumber[abs(lit)] if lit > 0 else -renumber[abs(lit)])
+                                  for lit in clause) + " 0")
+        outputs.append("\n".join(lines) + "\n")
+    return outputs
+
+
+def convert_batch(formulas):
+    """ convert a list of formulas (each a list of text chunks) with a
+        single run of the bool2cnf binary
+    """
+    p = Popen([_BOOL2CNF, '-s'], stdout=PIPE, stdin=PIPE)
+    owners = []
+    offset = 0
+    for i, chunks in enumerate(formulas):
+        owners.append(offset + 1)
+        highest = [0]
+
+        def shift(match):
+            v = int(match.group(1))
+            highest[0] = max(highest[0], v)
+            return "x{}".format(v + offset)
+
+        p.stdin.write(b"(" if i == 0 else b"\n& (")
+        p.stdin.write(_VARIABLE.sub(shift, "".join(chunks)).encode("utf-8"))
+        p.stdin.write(b")")
+        offset += highest[0]
+    p.stdin.close()
+    # parsed as bool2cnf writes it, without holding the whole text
+    outputs = split_cnf((line.decode("utf-8") for line in p.stdout), owners)
+    p.stdout.close()
+    p.wait()
+    return outputs
+
+
+def worker_main():
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    while True:
+        try:
+            count = int(read_frame(stdin))
+        except EOFError:
+            return
+        formulas = []
+        for _ in range(count):
+            chunks = []
+            while True:
+                chunk = read_frame(stdin)
+                if not chunk:
+                    break
+                chunks.append(chunk.decode("utf-8"))
+            formulas.append(chunks)
+        for output in convert_batch(formulas):
+            write_frame(stdout, output.encode("utf-8"))
+        stdout.flush()
+
+
+if __name__ == '__main__':
+    worker_main()
@@ -3,6 +3,7 @@
 import sys
 import itertools
 import utils
+from array import array
 from collections import defaultdict
 from pyminisolvers import minisolvers
 
@@ -23,6 +24,7 @@ class Decomp:
         self.nvars = self.num_class*self.num_v
         self.edgemap = dict()
         self.vertexmap = dict()
+        self.blocking = array('i', bytes(4 * self.nvars))
         self.solver = minisolvers.MinicardSolver()
 
         # build a vertex map and an edge map (for mapping vertices and edges to their variables)
@@ -112,8 +114,13 @@ class Decomp:
     def solve(self):
         return self.solver.solve()
 
-    def block(self):
-        self.solver.block_model()
+    def block(self, model):
+        # the vertex variables decide the edge variables, so blocking the
+        # model's vertex values (model[i] of variable i+1) is enough; the
+        # clause is rewritten in place for every model
+        for i, value in enumerate(model):
+            self.blocking[i] = -(i+1) if value else i+1
+        self.solver.add_clause(self.blocking)
 
 
 def print_model(lits, num_v, num_class):
@@ -153,18 +160,20 @@ def main():
     d = Decomp(num_v, num_k, num_lambda)
     with s.time("make formula"):
         d.make_formula()
+    # the incidence matrix of each design is read into this one buffer
+    model = array('i', bytes(4 * d.num_v*d.num_class))
     i = 0
     while True:
         with s.time("solving"):
             if_sat = d.solve()
         if if_sat:
-            model = list(d.solver.get_model())
-            d.block()
+            d.solver.get_model(0, len(model), out=model)
+            d.block(model)
             i += 1
             print(i)
             limit -= 1
             if sys.argv[-1] == '-v':
-                print_model(model[:d.num_v*d.num_class], num_v, d.num_class)
+                print_model(model, num_v, d.num_class)
             if limit == 0:
                 sys.stderr.write("Result limit reached.\n")
                 at_exit(s)
@@ -0,0 +1,321 @@
+"""Hash-consed Boolean formula DAG used by the lex-leader encodings.
+
+Every node is an integer id into a Formula; structurally identical
+subterms are created once, so a sub-expression such as (xA = xB) that
+several constraints refer to is a single node and, after conversion,
+a single Tseitin variable.
+
+Formulas can also be read from the bool2cnf text syntax (``! & | -> =``
+over variables ``x1, x2, ...``) and converted to CNF in-process, either
+with the full Tseitin transformation or with the polarity-aware
+Plaisted-Greenbaum one.
+"""
+import re
+from array import array
+
+VAR, NOT, AND, OR, IMPLIES, EQUIV = range(6)
+
+# operators in increasing order of binding strength
+_BINARY = ("=", "->", "|", "&")
+_TOKEN = re.compile(r"\s*(x\d+|->|[!&|=()])")
+
+
+class ClauseBuffer:
+    """ a flat buffer of integer clauses in DIMACS literal numbering;
+        the literals of clause i are lits[offsets[i]:offsets[i+1]]
+    """
+    def __init__(self):
+        self.lits = array('i')
+        self.offsets = array('i', [0])
+
+    @classmethod
+    def wrap(cls, lits, offsets):
+        """ a read-only ClauseBuffer over existing int sequences (e.g. memoryviews) """
+        buf = cls.__new__(cls)
+        buf.lits = lits
+        buf.offsets = offsets
+        return buf
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        lits = self.lits
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield lits[offsets[i]:offsets[i+1]]
+
+    def add(self, *lits):
+        self.lits.extend(lits)
+        self.offsets.append(len(self.lits))
+
+
+class Formula:
+    """ a table of formula nodes with structural hashing:
+        ops[i] is the operator of node i and args[i] its children
+        (or the variable number, for VAR nodes)
+    """
+    def __init__(self):
+        self.ops = array('b')
+        self.args = []
+        self.table = dict()
+
+    def __len__(self):
+        return len(self.ops)
+
+    def _node(self, op, args):
+        key = (op, args)
+        node = self.table.get(key)
+        if node is None:
+            node = len(self.ops)
+            self.ops.append(op)
+            self.args.append(args)
+            self.table[key] = node
+        return node
+
+    def var(self, v):
+        return self._node(VAR, (v,))
+
+    def neg(self, a):
+        return self._node(NOT, (a,))
+
+    def conj(self, *args):
+        if len(args) == 1:
+            return args[0]
+        return self._node(AND, args)
+
+    def disj(self, *args):
+        if len(args) == 1:
+            return args[0]
+        return self._node(OR, args)
+
+    def implies(self, a, b):
+        return self._node(IMPLIES, (a, b))
+
+    def equiv(self, a, b):
+        return self._node(EQUIV, (a, b))
+
+    def parse(self, text):
+        """ read a formula in bool2cnf syntax into this table
+            returns:
+                list of root nodes whose conjunction is the formula
+        """
+        tokens = []
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = _TOKEN.match(text, pos)
+            if match is None:
+                raise ValueError("unexpected input at position {}: {!r}".format(pos, text[pos:pos+20]))
+            tokens.append(match.group(1))
+            pos = match.end()
+        tokens.append(None)
+
+        self._tokens = tokens
+        self._pos = 0
+        root = self._parse_binary(0)
+        if tokens[self._pos] is not None:
+            raise ValueError("unexpected token {!r}".format(tokens[self._pos]))
+        del self._tokens
+        return [root]
+
+    def _parse_binary(self, level):
+        if level == len(_BINARY):
+            return self._parse_unary()
+        op = _BINARY[level]
+        operands = [self._parse_binary(level+1)]
+        while self._tokens[self._pos] == op:
+            self._pos += 1
+            operands.append(self._parse_binary(level+1))
+        if len(operands) == 1:
+            return operands[0]
+        if op == "&":
+            return self.conj(*operands)
+        if op == "|":
+            return self.disj(*operands)
+        # chains of -> and = associate to the left, as in bool2cnf
+        node = operands[0]
+        for operand in operands[1:]:
+            if op == "->":
+                node = self.implies(node, operand)
+            else:
+                node = self.equiv(node, operand)
+        return node
+
+    def _parse_unary(self):
+        token = self._tokens[self._pos]
+        self._pos += 1
+        if token == "!":
+            return self.neg(self._parse_unary())
+        if token == "(":
+            node = self._parse_binary(0)
+            if self._tokens[self._pos] != ")":
+                raise ValueError("expected ')' but found {!r}".format(self._tokens[self._pos]))
+            self._pos += 1
+            return node
+        if token is not None and token.startswith("x"):
+            return self.var(int(token[1:]))
+        raise ValueError("unexpected token {!r}".format(token))
+
+    def max_var(self):
+        """ the highest variable number of any VAR node in the table """
+        return max([args[0] for op, args in zip(self.ops, self.args) if op == VAR], default=0)
+
+    def postorder(self, roots):
+        """ yield every node reachable from roots once, children first """
+        seen = set()
+        for root in roots:
+            if root in seen:
+                continue
+            stack = [(root, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if expanded:
+                    yield node
+                    continue
+                if node in seen:
+                    continue
+                seen.add(node)
+                stack.append((node, True))
+                if self.ops[node] != VAR:
+                    for child in reversed(self.args[node]):
+                        if child not in seen:
+                            stack.append((child, False))
+
+    def to_string(self, roots):
+        """ serialize the conjunction of roots in bool2cnf syntax;
+            shared nodes are expanded at every use
+        """
+        text = dict()
+        for node in self.postorder(roots):
+            op = self.ops[node]
+            args = self.args[node]
+            if op == VAR:
+                text[node] = "x{}".format(args[0])
+            elif op == NOT:
+                text[node] = "!" + text[args[0]]
+            elif op == AND:
+                text[node] = "(" + " & ".join(text[a] for a in args) + ")"
+            elif op == OR:
+                text[node] = "(" + " | ".join(text[a] for a in args) + ")"
+            elif op == IMPLIES:
+                text[node] = "({} -> {})".format(text[args[0]], text[args[1]])
+            elif op == EQUIV:
+                text[node] = "({} = {})".format(text[args[0]], text[args[1]])
+
+        lines = []
+        for root in roots:
+            op = self.ops[root]
+            if op == AND:
+                lines.append("(" + "\n& ".join(text[a] for a in self.args[root]) + ")")
+            elif op == OR:
+                lines.append("(" + "\n| ".join(text[a] for a in self.args[root]) + ")")
+            else:
+                lines.append(text[root])
+        return "\n& ".join(lines)
+
+    def polarities(self, roots):
+        """ returns a dict from every node below roots to a bitmask of the
+            polarities it occurs in (1 = positive, 2 = negative), with the
+            roots taken positively
+        """
+        order = list(self.postorder(roots))
+        polarity = dict.fromkeys(order, 0)
+        for root in roots:
+            polarity[root] |= 1
+        # parents come before their children in reverse postorder
+        for node in reversed(order):
+            op = self.ops[node]
+            if op == VAR:
+                continue
+            pol = polarity[node]
+            flipped = ((pol & 1) << 1) | ((pol & 2) >> 1)
+            args = self.args[node]
+            if op == NOT:
+                polarity[args[0]] |= flipped
+            elif op == IMPLIES:
+                polarity[args[0]] |= flipped
+                polarity[args[1]] |= pol
+            elif op == EQUIV:
+                polarity[args[0]] |= 3
+                polarity[args[1]] |= 3
+            else:
+                for child in args:
+                    polarity[child] |= pol
+        return polarity
+
+    def tseitin(self, roots, num_var, clauses=None, pg=False):
+        """ convert the conjunction of roots to CNF with one fresh variable
+            per distinct non-literal node (variables above num_var);
+            top-level conjunctions are asserted directly
+            with pg=True only the implication directions each node's
+            polarity needs are emitted (Plaisted-Greenbaum), which keeps the
+            formula equisatisfiable with fewer clauses
+            returns:
+                (clauses, num_var) with the ClauseBuffer filled and the
+                highest variable number in use
+        """
+        if clauses is None:
+            clauses = ClauseBuffer()
+
+        asserted = []
+        stack = list(reversed(roots))
+        while stack:
+            node = stack.pop()
+            if self.ops[node] == AND:
+                stack.extend(reversed(self.args[node]))
+            else:
+                asserted.append(node)
+
+        if pg:
+            polarity = self.polarities(asserted)
+
+        lit = dict()
+        for node in self.postorder(asserted):
+            op = self.ops[node]
+            args = self.args[node]
+            if op == VAR:
+                lit[node] = args[0]
+                continue
+            if op == NOT:
+                lit[node] = -lit[args[0]]
+                continue
+            num_var += 1
+            t = num_var
+            lit[node] = t
+            pos, neg = True, True
+            if pg:
+                pos, neg = polarity[node] & 1, polarity[node] & 2
+            if op == AND:
+                children = [lit[a] for a in args]
+                if pos:
+                    for c in children:
+                        clauses.add(-t, c)
+                if neg:
+                    clauses.add(t, *[-c for c in children])
+            elif op == OR:
+                children = [lit[a] for a in args]
+                if neg:
+                    for c in children:
+                        clauses.add(t, -c)
+                if pos:
+                    clauses.add(-t, *children)
+            elif op == IMPLIES:
+                a, b = lit[args[0]], lit[args[1]]
+                if pos:
+                    clauses.add(-t, -a, b)
+                if neg:
+                    clauses.add(t, a)
+                    clauses.add(t, -b)
+            elif op == EQUIV:
+                a, b = lit[args[0]], lit[args[1]]
+                if pos:
+                    clauses.add(-t, -a, b)
+                    clauses.add(-t, a, -b)
+                if neg:
+                    clauses.add(t, a, b)
+                    clauses.add(t, -a, -b)
+
+        for node in asserted:
+            clauses.add(lit[node])
+        return clauses, num_var
@@ -0,0 +1,110 @@
+"""On-disk cache of converted lex-leader constraints.
+
+The lex-leader CNF of a matrix only depends on its shape, the encoding
+option and the conversion method, so it can be reused across runs.  Each
+entry is one file named after a hash of its key, holding a small header
+followed by int32 arrays (clause offsets, clause literals and the
+var2realvar pairs).  Entries are read through mmap, so the clause arrays
+are not parsed; loading them into a solver copies them once, in bulk.
+An entry that does not match its header (e.g. one cut short by a full
+disk) is treated as a miss and removed.
+
+The cache is bounded in size: after every store the least recently used
+entries (by file modification time, which a hit refreshes) are removed
+until the total size is under the limit.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from formula import ClauseBuffer
+
+FORMAT_VERSION = 1
+_MAGIC = b"LEXC"
+# magic, format version, number of variables, clauses, literals, map pairs
+_HEADER = struct.Struct("<4s5i")
+_SUFFIX = ".lex"
+
+
+class LexCache:
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        digest = hashlib.sha256(repr((FORMAT_VERSION,) + tuple(key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + _SUFFIX)
+
+    def get(self, key):
+        """ returns (clauses, num_var, var2realvar) for key, or None on a miss;
+            clauses is a ClauseBuffer backed by the mapped file
+        """
+        path = self.path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                return self._discard(path)
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_var, num_clauses, num_lits, num_pairs = _HEADER.unpack_from(mapped)
+        counts = (num_var, num_clauses, num_lits, num_pairs)
+        if (magic != _MAGIC or version != FORMAT_VERSION or min(counts) < 0
+                or size != _HEADER.size + 4 * (num_clauses + 1 + num_lits + 2*num_pairs)):
+            mapped.close()
+            return self._discard(path)
+        ints = memoryview(mapped)[_HEADER.size:].cast("i")
+        offsets = ints[:num_clauses+1]
+        lits = ints[num_clauses+1:num_clauses+1+num_lits]
+        if offsets[0] != 0 or offsets[-1] != num_lits:
+            return self._discard(path)
+        pairs = ints[num_clauses+1+num_lits:num_clauses+1+num_lits+2*num_pairs]
+        var2realvar = dict(zip(pairs[0::2], pairs[1::2]))
+        os.utime(path)  # mark as recently used
+        return ClauseBuffer.wrap(lits, offsets), num_var, var2realvar
+
+    def _discard(self, path):
+        """ remove a corrupt entry; returns None, as for a miss """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # removed by another run meanwhile
+        return None
+
+    def put(self, key, clauses, num_var, var2realvar):
+        """ store a converted formula under key, then evict old entries """
+        pairs = array("i")
+        for var, realvar in var2realvar.items():
+            pairs.append(var)
+            pairs.append(realvar)
+        header = _HEADER.pack(_MAGIC, FORMAT_VERSION, num_var, len(clauses),
+                              len(clauses.lits), len(var2realvar))
+
+        # write to a temporary file first so readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            array("i", clauses.offsets).tofile(f)
+            array("i", clauses.lits).tofile(f)
+            pairs.tofile(f)
+        os.replace(tmp, self.path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(_SUFFIX):
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
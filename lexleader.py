@@ -1,53 +1,352 @@
 import sys
+from operator import itemgetter
+from types import MethodType
+import cnfpool
+from formula import ClauseBuffer, Formula
+
+# rough per-item memory costs used by LexLeader.estimate_size()
+CLAUSE_BUFFER_BYTES = (4, 4)         # per literal, per clause (array('i') entries)
+SOLVER_CLAUSE_BYTES = (4, 40)        # per literal, per clause (MiniSat clause + 2 watchers)
+FORMULA_NODE_BYTES = 250             # per DAG node (args tuple, table entry, ops slot)
+
+
+def parse_policy(spec):
+    """ read an encoding policy: either a single option such as "ror", or
+        options separated by increasing length thresholds, such as
+        "ror:20:alpha-m" (ror for vectors shorter than 20, alpha-m for the rest)
+        returns:
+            list of (bound, option) pairs, an option applying to vectors
+            shorter than its bound; the last bound is None
+    """
+    fields = spec.split(":")
+    if len(fields) % 2 == 0:
+        raise ValueError("policy {!r} must alternate options and thresholds".format(spec))
+    policy = []
+    previous = 0
+    for i in range(0, len(fields)-1, 2):
+        bound = int(fields[i+1])
+        if bound <= previous:
+            raise ValueError("thresholds of policy {!r} must increase".format(spec))
+        policy.append((bound, fields[i]))
+        previous = bound
+    policy.append((None, fields[-1]))
+    return policy
 
 
 class LexLeader:
-    def __init__(self, columns, rows, option, columns_enabled=True, rows_enabled=True):
+    __slots__ = ("num_columns", "num_rows", "option", "row_option", "column_policy", "row_policy",
+                 "columns_enabled", "rows_enabled", "window", "first_k", "num_var", "formula", "clauses",
+                 "encoding", "which_lex", "which_lex_clauses", "one_sided")
+
+    def __init__(self, columns, rows, option, columns_enabled=True, rows_enabled=True, row_option=None,
+                 window=1, first_k=None):
+        """ option is the encoding policy of the column constraints (see
+            parse_policy()) and, unless row_option is given, of the row
+            constraints too
+            window: each vector is compared with this many preceding vectors
+                    (1: adjacent pairs only, None: all pairs)
+            first_k: if set, every comparison only covers the first first_k
+                     positions of the vectors
+        """
+        if window is not None and window < 1:
+            raise ValueError("window must be at least 1 (None for all pairs), not {}".format(window))
+        if first_k is not None and first_k < 1:
+            raise ValueError("first_k must be at least 1, not {}".format(first_k))
         self.num_columns = columns
         self.num_rows = rows
+        self.option = option
+        self.row_option = option if row_option is None else row_option
+        self.column_policy = parse_policy(self.option)
+        self.row_policy = parse_policy(self.row_option)
         self.columns_enabled = columns_enabled
         self.rows_enabled = rows_enabled
-        self.varmap = dict()
-        self.num_var = 0
-        self.parse_option(option)
-        for c in range(columns):
-            for r in range(rows):
-                self.num_var += 1
-                self.varmap[(c, r)] = self.num_var
+        self.window = window
+        self.first_k = first_k
+        # matrix variables are numbered column by column: see var()
+        self.num_var = columns * rows
+        self.formula = Formula()
+        self.encoding = None
+        options = [each for _, each in self.row_policy + self.column_policy]
+        for each in options:
+            self.parse_option(each)
+        # native constraints are posted to the solver for every pair at once
+        # (see post_lexleader()), so they cannot share the matrix with others
+        if "native" in options and any(each != "native" for each in options):
+            raise ValueError("native cannot be mixed with other encodings (option {!r}, row option {!r})"
+                             .format(self.option, self.row_option))
 
     def parse_option(self, option):
-        if option == "and":
-            self.which_lex = self._and_helper
-        elif option == "and-cse":
-            self.which_lex = self._and_subexpr_helper
-        elif option == "or":
-            self.which_lex = self._or_helper
-        elif option == "or-cse":
-            self.which_lex = self._or_subexpr_helper
-        elif option == "ror":
-            self.which_lex = self._ror_helper
-        elif option == "alpha":
-            self.which_lex = self._alpha_helper
-        elif option == "alpha-m":
-            self.which_lex = self._alpha_m_helper
-        elif option == "harvey":
-            self.which_lex = self._harvey_helper
+        """ make option the encoding used by which_lex and which_lex_clauses """
+        if option == self.encoding:
+            return
+        encoder = ENCODERS.get(option)
+        if encoder is None:
+            raise ValueError("unknown lex-leader option {!r}".format(option))
+        self.encoding = option
+        # <option>-pg: define the auxiliary variables of the CSE encodings
+        # only in the direction their single polarity of use needs
+        self.one_sided = encoder.one_sided
+        if encoder.formula is None:
+            # no decomposition: the solver propagates the constraints itself,
+            # see post_lexleader()
+            self.which_lex = None
+            self.which_lex_clauses = None
+            return
+        self.which_lex = MethodType(encoder.formula, self)
+        self.which_lex_clauses = MethodType(encoder.clauses, self)
 
-    def make_lexleader(self):
-        """ return the row and column lex-leader constraints of the full matrix
+    def _encode_with(self, option):
+        """ parse_option() before generating constraints, which native has
+            none of
+        """
+        encoder = ENCODERS.get(option)
+        if encoder is not None and encoder.formula is None:
+            raise ValueError("lex-leader option {!r} has no formula or clauses; "
+                             "post it with post_lexleader()".format(option))
+        self.parse_option(option)
+
+    def var(self, c, r):
+        """ the variable of matrix cell (column c, row r) """
+        return c*self.num_rows + r + 1
+
+    def column(self, c):
+        """ the variables of column c, top to bottom, as a range """
+        return range(c*self.num_rows + 1, (c+1)*self.num_rows + 1)
+
+    def row(self, r):
+        """ the variables of row r, left to right, as a range """
+        return range(r + 1, self.num_columns*self.num_rows + 1, self.num_rows)
+
+    def encoding_for(self, length, row=False):
+        """ the option the column (or row) policy picks for vectors of the
+            given length
+        """
+        for bound, option in self.row_policy if row else self.column_policy:
+            if bound is None or length < bound:
+                return option
+
+    def encoded_pairs(self):
+        """ yield (vector1, vector2, option) for the pairs of matrix variables
+            that get a lex-leader constraint, columns then rows, each with the
+            encoding its dimension's policy picks; within a dimension, vector1
+            runs from the last vector down to the second, and vector2 over the
+            window vectors just before it, nearest first (all the vectors
+            before it if window is None); vectors are cut to their first
+            first_k positions if that is set
+            all of these constraints are implied by the adjacent full-length
+            ones, so the lex-leaders of the matrix stay the same, only the
+            pruning strength changes
         """
-        full = []
         if self.columns_enabled:
-            for c in range(self.num_columns-1, 0, -1):
-                column1 = [self.varmap[(c, r)] for r in range(self.num_rows)]
-                column2 = [self.varmap[(c-1, r)] for r in range(self.num_rows)]
-                full.append(self.which_lex(column1, column2))
+            option = self.encoding_for(len(self._truncate(self.column(0))))
+            for c, p in self._window_pairs(self.num_columns):
+                yield self._truncate(self.column(c)), self._truncate(self.column(p)), option
         if self.rows_enabled:
-            for r in range(self.num_rows-1, 0, -1):
-                row1 = [self.varmap[(c, r)] for c in range(self.num_columns)]
-                row2 = [self.varmap[(c, r-1)] for c in range(self.num_columns)]
-                full.append(self.which_lex(row1, row2))
-        return "\n& ".join(full)
+            option = self.encoding_for(len(self._truncate(self.row(0))), row=True)
+            for r, p in self._window_pairs(self.num_rows):
+                yield self._truncate(self.row(r)), self._truncate(self.row(p)), option
+
+    def _window_pairs(self, count):
+        # (i, j) with j < i within the window, last vector first
+        for i in range(count-1, 0, -1):
+            lowest = 0 if self.window is None else max(0, i - self.window)
+            for j in range(i-1, lowest-1, -1):
+                yield i, j
+
+    def _truncate(self, vector):
+        if self.first_k is None:
+            return vector
+        return vector[:self.first_k]
+
+    def vector_pairs(self):
+        """ yield the (vector1, vector2) pairs of matrix variables that get a
+            lex-leader constraint: adjacent columns, then adjacent rows
+        """
+        for vector1, vector2, _ in self.encoded_pairs():
+            yield vector1, vector2
+
+    def post_lexleader(self, solver):
+        """ post the lex-leader constraints to a MinicardSolver as native lex
+            constraints, one per vector pair; the matrix variables must be
+            the solver's variables 1..num_columns*num_rows
+        """
+        if self.option != "native":
+            raise ValueError("only the native option can be posted, not {!r}".format(self.option))
+        for vector1, vector2 in self.vector_pairs():
+            solver.add_lex_leq(vector1, vector2)
+
+    def make_lexleader_formula(self):
+        """ return the row and column lex-leader constraints of the full matrix
+            as a list of root nodes in self.formula
+        """
+        full = []
+        for vector1, vector2, option in self.encoded_pairs():
+            self._encode_with(option)
+            full.extend(self.which_lex(vector1, vector2))
+        return full
+
+    def make_lexleader(self):
+        """ return the row and column lex-leader constraints of the full matrix
+        """
+        return self.formula.to_string(self.make_lexleader_formula())
+
+    def make_lexleader_tseitin(self, pg=False):
+        """ return the row and column lex-leader constraints of the full matrix
+            as a ClauseBuffer, converting the formula DAG in-process with one
+            Tseitin variable per distinct sub-expression
+            (Plaisted-Greenbaum polarity reduction if pg is set); no two
+            pairs share a sub-expression, so each length is converted once
+            and copied (see make_lexleader_batch())
+        """
+        return self.make_lexleader_batch("pg" if pg else "tseitin")
+
+    def make_lexleader_clauses(self):
+        """ return the row and column lex-leader constraints of the full matrix
+            as a ClauseBuffer, skipping the bool2cnf conversion entirely;
+            matrix variables keep their var() numbers and auxiliary
+            variables are numbered from there up to self.num_var
+        """
+        return self.make_lexleader_batch("clauses")
+
+    def make_lexleader_batch(self, cnf="clauses"):
+        """ return the constraints of all vector pairs as one ClauseBuffer,
+            the same as concatenating make_pair_clauses() over encoded_pairs()
+            but without running the encoder per pair: pairs of the same length
+            only differ in their variable numbers, so each length and option
+            is encoded once on a probe matrix and copied with the variables
+            renumbered
+            inputs:
+                cnf: "clauses", "tseitin" or "pg", as in make_pair_clauses()
+        """
+        templates = dict()
+        clauses = ClauseBuffer()
+        for vector1, vector2, option in self.encoded_pairs():
+            n = len(vector1)
+            if (n, option) not in templates:
+                # the probe's only pair is (column 1, column 0) = (n+1..2n, 1..n)
+                probe = LexLeader(2, n, option, rows_enabled=False)
+                template = probe.make_pair_clauses(probe.column(1), probe.column(0), cnf)
+                templates[n, option] = (itemgetter(*template.lits), template.offsets[1:], probe.num_var - 2*n)
+            renumbered, offsets, aux_vars = templates[n, option]
+
+            # renumber[v] is the new number of probe variable v, and
+            # renumber[-v] its negation
+            renumber = [0, *vector2, *vector1, *range(self.num_var+1, self.num_var+aux_vars+1)]
+            renumber.extend([-v for v in reversed(renumber)][:-1])
+            base = len(clauses.lits)
+            clauses.lits.extend(renumbered(renumber))
+            clauses.offsets.extend(map(base.__add__, offsets))
+            self.num_var += aux_vars
+        return clauses
+
+    def iter_lexleader(self):
+        """ yield the lex-leader constraint of each vector pair as a string,
+            ready to be joined with "\n& "; the formula is rebuilt for every
+            pair, so memory is bounded by the longest vector
+        """
+        for vector1, vector2, option in self.encoded_pairs():
+            self.formula = Formula()
+            self._encode_with(option)
+            yield self.formula.to_string(self.which_lex(vector1, vector2))
+
+    def iter_lexleader_tseitin(self, pg=False):
+        """ yield the Tseitin conversion of each vector pair's constraint as
+            its own ClauseBuffer; see iter_lexleader()
+        """
+        for vector1, vector2, option in self.encoded_pairs():
+            yield self.make_pair_clauses(vector1, vector2, "pg" if pg else "tseitin", option)
+
+    def iter_lexleader_clauses(self):
+        """ yield the hand-written clauses of each vector pair's constraint as
+            its own ClauseBuffer; see iter_lexleader()
+        """
+        for vector1, vector2, option in self.encoded_pairs():
+            yield self.make_pair_clauses(vector1, vector2, "clauses", option)
+
+    def make_pair_clauses(self, vector1, vector2, cnf="clauses", option=None):
+        """ return the constraint of a single vector pair as a ClauseBuffer,
+            with auxiliary variables numbered from self.num_var up
+            inputs:
+                cnf: "clauses" (hand-written clauses), "tseitin" or "pg"
+                option: the encoding, by default the column policy's choice
+                        for the vector length
+        """
+        if option is None:
+            option = self.encoding_for(len(vector1))
+        self._encode_with(option)
+        if cnf == "clauses":
+            self.clauses = ClauseBuffer()
+            self.which_lex_clauses(vector1, vector2)
+            return self.clauses
+        self.formula = Formula()
+        clauses, self.num_var = self.formula.tseitin(self.which_lex(vector1, vector2), self.num_var, pg=(cnf == "pg"))
+        return clauses
+
+    def violated_pairs(self, model):
+        """ return the (vector1, vector2, option) triples of encoded_pairs()
+            whose lex-leader constraint the model breaks; model[v-1] is the
+            value of matrix variable v
+        """
+        violated = []
+        for vector1, vector2, option in self.encoded_pairs():
+            if [model[v-1] for v in vector1] > [model[v-1] for v in vector2]:
+                violated.append((vector1, vector2, option))
+        return violated
+
+    def estimate_size(self, cnf="clauses"):
+        """ predict the size of the converted lex-leader constraints without
+            building them: every vector pair of the same length converts to
+            the same number of auxiliary variables, clauses and literals, so
+            one probe pair is built per distinct length and option and scaled up
+            inputs:
+                cnf: "clauses" (make_lexleader_clauses), "tseitin" or "pg"
+                     (make_lexleader_tseitin), or "bool2cnf" (make_lexleader
+                     converted by the bool2cnf binary, which is run on the
+                     probe pairs)
+            returns:
+                dict with "aux_vars", "clauses" and "literals" counts, exact
+                for the chosen conversion, and "peak_bytes", an estimate of
+                the memory held by the clause buffer, the formula DAG (the
+                whole matrix's for bool2cnf, the largest probe pair's for
+                tseitin/pg) and the clauses once loaded into a solver;
+                native pairs count as no clauses at all
+        """
+        if cnf not in ("clauses", "tseitin", "pg", "bool2cnf"):
+            raise ValueError("no size estimate for conversion {!r}".format(cnf))
+        lengths = [(len(vector1), option) for vector1, _, option in self.encoded_pairs()]
+
+        per_length = dict()
+        for n, option in set(lengths):
+            if ENCODERS[option].formula is None:
+                per_length[n, option] = (0, 0, 0, 0)
+                continue
+            probe = LexLeader(2, n, option, rows_enabled=False)
+            if cnf == "clauses":
+                clauses = probe.make_lexleader_clauses()
+            elif cnf == "bool2cnf":
+                num_var, num_clauses, num_lits = _bool2cnf_size(probe.make_lexleader())
+                per_length[n, option] = (num_var - 2*n, num_clauses, num_lits, len(probe.formula))
+                continue
+            else:
+                clauses = probe.make_pair_clauses(probe.column(1), probe.column(0), cnf, option)
+            per_length[n, option] = (probe.num_var - 2*n, len(clauses), len(clauses.lits), len(probe.formula))
+
+        aux_vars, num_clauses, num_lits, nodes = [sum(per_length[each][i] for each in lengths) for i in range(4)]
+        if cnf != "bool2cnf" and lengths:
+            # tseitin/pg build the formula of one probe pair at a time
+            nodes = max(per_length[each][3] for each in lengths)
+        if cnf == "bool2cnf" and len(lengths) > 1:
+            # bool2cnf gives each "&" joining two pairs' constraints a
+            # variable, whose unit and two binary clauses replace the units
+            # of the two sides: one variable, clause and three literals more
+            aux_vars += len(lengths) - 1
+            num_clauses += len(lengths) - 1
+            num_lits += 3 * (len(lengths) - 1)
+        peak = (num_lits * (CLAUSE_BUFFER_BYTES[0] + SOLVER_CLAUSE_BYTES[0])
+                + num_clauses * (CLAUSE_BUFFER_BYTES[1] + SOLVER_CLAUSE_BYTES[1]))
+        if cnf != "clauses":
+            peak += nodes * FORMULA_NODE_BYTES
+        return {"aux_vars": aux_vars, "clauses": num_clauses, "literals": num_lits, "peak_bytes": peak}
 
     def add_assumps(self, *variables):
         assumps = []
@@ -58,117 +357,205 @@ class LexLeader:
                 assumps.append("x{}".format(var))
         return "\n& "+"\n& ".join(assumps)
 
+    def _new_var(self):
+        self.num_var += 1
+        return self.num_var
+
+    def _extend_prefix(self, prefix, node):
+        if prefix is None:
+            return node
+        return self.formula.conj(prefix, node)
+
+    def _vars(self, vector):
+        return [None] + [self.formula.var(v) for v in vector]
+
+    def _leq(self, a, b):
+        # a <= b
+        return self.formula.disj(self.formula.neg(a), b)
+
+    def _less(self, a, b):
+        # a < b
+        return self.formula.conj(self.formula.neg(a), b)
+
+    def _define(self, x, rhs, used):
+        # x <=> rhs, or for the one-sided options only the direction needed by
+        # the polarity x is used in (1 = positive: x -> rhs, 2 = negative: rhs -> x)
+        if not self.one_sided:
+            return self.formula.equiv(x, rhs)
+        if used == 1:
+            return self.formula.implies(x, rhs)
+        return self.formula.implies(rhs, x)
+
     def _and_helper(self, vector1, vector2):
         """ creates the lex-leader constraints between two vectors of variables
             via the plain AND decomposition encoding
             inputs:
-                vector1, vector2: lists of integers, equivalent lengths,
+                vector1, vector2: sequences of integers, equivalent lengths,
                                   each representing a vector of variables
             returns:
-                string containing the full expression of the lex-leader constraint
+                list of formula nodes whose conjunction is the lex-leader constraint
         """
+        f = self.formula
         # setup vectors with 1-based indexing to match constraints in the source paper
-        A = [None] + vector1
-        B = [None] + vector2
+        A = self._vars(vector1)
+        B = self._vars(vector2)
 
         res = []
-        res.append( "(!x{} | x{})".format(A[1], B[1]) )
+        res.append( self._leq(A[1], B[1]) )
 
         assert len(vector1) == len(vector2)
         for i in range(1, len(vector1)):
             temp = []
             for j in range(1, i+1):
-                temp.append( "(x{} = x{})".format(A[j], B[j]) )
-            temp = " & ".join(temp)
-            res.append( "({} -> (!x{} | x{}))".format(temp, A[i+1], B[i+1]) )
-        return "("+"\n& ".join(res)+")"
+                temp.append( f.equiv(A[j], B[j]) )
+            res.append( f.implies(f.conj(*temp), self._leq(A[i+1], B[i+1])) )
+        return res
+
+    def _and_prefix_helper(self, vector1, vector2):
+        """ creates the lex-leader constraints between two vectors of variables
+            via the plain AND decomposition encoding, building each equality
+            prefix once from the previous one so the formula stays linear in
+            the vector length
+            inputs:
+                vector1, vector2: sequences of integers, equivalent lengths,
+                                  each representing a vector of variables
+            returns:
+                list of formula nodes whose conjunction is the lex-leader constraint
+        """
+        f = self.formula
+        # setup vectors with 1-based indexing to match constraints in the source paper
+        A = self._vars(vector1)
+        B = self._vars(vector2)
+
+        res = []
+        res.append( self._leq(A[1], B[1]) )
+
+        assert len(vector1) == len(vector2)
+        prefix = None
+        for i in range(1, len(vector1)):
+            # prefix is (A[1] = B[1]) & ... & (A[i] = B[i])
+            prefix = self._extend_prefix(prefix, f.equiv(A[i], B[i]))
+            res.append( f.implies(prefix, self._leq(A[i+1], B[i+1])) )
+        return res
 
     def _and_subexpr_helper(self, vector1, vector2):
         """ creates the lex-leader constraints between two vectors of variables
             via the AND decomposition encoding using common sub-expression elimination
             inputs:
-                vector1, vector2: lists of integers, equivalent lengths,
+                vector1, vector2: sequences of integers, equivalent lengths,
                                   each representing a vector of variables
             returns:
-                string containing the full expression of the lex-leader constraint
+                list of formula nodes whose conjunction is the lex-leader constraint
         """
+        f = self.formula
         # setup vectors with 1-based indexing to match constraints in the source paper
-        A = [None] + vector1
-        B = [None] + vector2
+        A = self._vars(vector1)
+        B = self._vars(vector2)
 
         # creating the extra variables
         X = dict()
         assert len(vector1) == len(vector2)
         for i in range(1, len(vector1)):
-            self.num_var += 1
-            X[i] = self.num_var
+            X[i] = f.var(self._new_var())
 
         res = []
 
         # A[1] <= B[1]   (thesis, 3.18)
-        res.append( "(!x{} | x{})".format(A[1], B[1]) )
+        res.append( self._leq(A[1], B[1]) )
         # X[1] <=> (A[1] = B[1])   (thesis, 3.19)
-        res.append( "(x{} = (x{} = x{}))".format(X[1], A[1], B[1]) )
+        # (X only occurs negatively)
+        res.append( self._define(X[1], f.equiv(A[1], B[1]), 2) )
 
         # 1 <= i <= n-2, X[i+1] <=> (X[i] & (A[i+1] = B[i+1]))   (thesis, 3.20)
         for i in range(1, len(vector1)-1):
-            res.append( "(x{} = (x{} & (x{} = x{})))".format(X[i+1], X[i], A[i+1], B[i+1]) )
+            res.append( self._define(X[i+1], f.conj(X[i], f.equiv(A[i+1], B[i+1])), 2) )
         # i <= i <= n-1, X[i] -> (A[i+1] <= B[i+1])   (thesis, 3.21)
         for i in range(1, len(vector1)):
-            res.append( "(x{} -> (!x{} | x{}))".format(X[i], A[i+1], B[i+1]) )
+            res.append( f.implies(X[i], self._leq(A[i+1], B[i+1])) )
 
-        return "("+"\n& ".join(res)+")"
+        return res
 
     def _or_helper(self, vector1, vector2):
         """ creates the lex-leader constraints between two vectors of variables
             via the plain OR decomposition encoding
             inputs:
-                vector1, vector2: lists of integers, equivalent lengths,
+                vector1, vector2: sequences of integers, equivalent lengths,
                                   each representing a vector of variables
             returns:
-                string containing the full expression of the lex-leader constraint
+                list of formula nodes whose conjunction is the lex-leader constraint
         """
+        f = self.formula
         # setup vectors with 1-based indexing to match constraints in the source paper
-        A = [None] + vector1
-        B = [None] + vector2
+        A = self._vars(vector1)
+        B = self._vars(vector2)
 
         res = []
-        res.append( "(!x{} & x{})".format(A[1], B[1]) )
+        res.append( self._less(A[1], B[1]) )
 
         assert len(vector1) == len(vector2)
         for i in range(1, len(vector1)):
             temp = []
             for j in range(1, i+1):
-                temp.append( "(x{} = x{})".format(A[j], B[j]) )
-            temp = " & ".join(temp)
-            res.append( "({} & (!x{} & x{}))".format(temp, A[i+1], B[i+1]) )
+                temp.append( f.equiv(A[j], B[j]) )
+            res.append( f.conj(f.conj(*temp), self._less(A[i+1], B[i+1])) )
 
         temp = []
         for i in range(1, len(vector1)+1):
-            temp.append( "(x{} = x{})".format(A[i], B[i]) )
-        res.append(" & ".join(temp))
+            temp.append( f.equiv(A[i], B[i]) )
+        res.append( f.conj(*temp) )
+
+        return [f.disj(*res)]
 
-        return "("+"\n| ".join(res)+")"
+    def _or_prefix_helper(self, vector1, vector2):
+        """ creates the lex-leader constraints between two vectors of variables
+            via the plain OR decomposition encoding, building each equality
+            prefix once from the previous one so the formula stays linear in
+            the vector length
+            inputs:
+                vector1, vector2: sequences of integers, equivalent lengths,
+                                  each representing a vector of variables
+            returns:
+                list of formula nodes whose conjunction is the lex-leader constraint
+        """
+        f = self.formula
+        # setup vectors with 1-based indexing to match constraints in the source paper
+        A = self._vars(vector1)
+        B = self._vars(vector2)
+
+        res = []
+        res.append( self._less(A[1], B[1]) )
+
+        assert len(vector1) == len(vector2)
+        prefix = None
+        for i in range(1, len(vector1)):
+            # prefix is (A[1] = B[1]) & ... & (A[i] = B[i])
+            prefix = self._extend_prefix(prefix, f.equiv(A[i], B[i]))
+            res.append( f.conj(prefix, self._less(A[i+1], B[i+1])) )
+
+        n = len(vector1)
+        res.append( self._extend_prefix(prefix, f.equiv(A[n], B[n])) )
+
+        return [f.disj(*res)]
 
     def _or_subexpr_helper(self, vector1, vector2):
         """ creates the lex-leader constraints between two vectors of variables
             via the OR decomposition encoding using common sub-expression elimination
             inputs:
-                vector1, vector2: lists of integers, equivalent lengths,
+                vector1, vector2: sequences of integers, equivalent lengths,
                                   each representing a vector of variables
             returns:
-                string containing the full expression of the lex-leader constraint
+                list of formula nodes whose conjunction is the lex-leader constraint
         """
+        f = self.formula
         # setup vectors with 1-based indexing to match constraints in the source paper
-        A = [None] + vector1
-        B = [None] + vector2
+        A = self._vars(vector1)
+        B = self._vars(vector2)
 
         # creating the extra variables
         X = dict()
         assert len(vector1) == len(vector2)
         for i in range(1, len(vector1)+1):
-            self.num_var += 1
-            X[i] = self.num_var
+            X[i] = f.var(self._new_var())
 
         res = []  # for ANDing each element...
         temp = []  # for ORing each element...
@@ -176,156 +563,509 @@ class LexLeader:
         n = len(vector1)
 
         # A[1] < B[1]
-        temp.append( "(!x{} & x{})".format(A[1], B[1]) )
+        temp.append( self._less(A[1], B[1]) )
         # 1 <= i <= n-1, X[i] & (A[i+1] < B[i+1]))
         for i in range(1, n):
-            temp.append( "(x{} & (!x{} & x{}))".format(X[i], A[i+1], B[i+1]) )
+            temp.append( f.conj(X[i], self._less(A[i+1], B[i+1])) )
         # X[n]
-        temp.append( "x{}".format(X[n]) )
-        res.append( "("+" | ".join(temp)+")" )
+        temp.append( X[n] )
+        res.append( f.disj(*temp) )
 
         # X[1] <=> A[1] = B[1]   (thesis, 3.36)
-        res.append( "(x{} = (x{} = x{}))".format(X[1], A[1], B[1]) )
+        # (X only occurs positively)
+        res.append( self._define(X[1], f.equiv(A[1], B[1]), 1) )
         # 1 <= i <= n−1, X[i+1] <=> (X[i] & (A[i+1] = B[i+1]))   (thesis, 3.37)
         for i in range(1, n):
-            res.append( "(x{} = (x{} & (x{} = x{})))".format(X[i+1], X[i], A[i+1], B[i+1]) )
+            res.append( self._define(X[i+1], f.conj(X[i], f.equiv(A[i+1], B[i+1])), 1) )
 
-        return "("+"\n& ".join(res)+")"
+        return res
 
     def _ror_helper(self, vector1, vector2):
         """ creates the lex-leader constraints between two vectors of variables
             via the recursive OR decomposition encoding using common sub-expression elimination
             inputs:
-                vector1, vector2: lists of integers, equivalent lengths,
+                vector1, vector2: sequences of integers, equivalent lengths,
                                   each representing a vector of variables
             returns:
-                string containing the full expression of the lex-leader constraint
+                list of formula nodes whose conjunction is the lex-leader constraint
         """
+        f = self.formula
         # setup vectors with 1-based indexing to match constraints in the source paper
-        A = [None] + vector1
-        B = [None] + vector2
+        A = self._vars(vector1)
+        B = self._vars(vector2)
         assert len(vector1) == len(vector2)
         n = len(vector1)
 
         # creating the extra variables
         X = dict()
         for i in range(1, len(vector1)+1):
-            self.num_var += 1
-            X[i] = self.num_var
+            X[i] = f.var(self._new_var())
 
         res = []
         # X[1]   (thesis, 3.44)
-        res.append( "(x{})".format(X[1]) )
+        res.append( X[1] )
         # X[n] <=> (A[n] <= B[n])   (thesis, 3.45)
-        res.append( "(x{} = (!x{} | x{}))".format(X[n], A[n], B[n]) )
+        # (X only occurs positively)
+        res.append( self._define(X[n], self._leq(A[n], B[n]), 1) )
         # 1 <= i <= n−1, X[n−i] <=> (A[n−i]<B[n−i] | (A[n−i]=B[n−i] & X[n−i+1]))   (thesis, 3.46)
         for i in range(1, n):
-            res.append( "(x{0} = ((!x{1} & x{2}) | ((x{1}=x{2}) & x{3})))".format(X[n-i], A[n-i], B[n-i], X[n-i+1]) )
+            res.append( self._define(X[n-i], f.disj(self._less(A[n-i], B[n-i]),
+                                                    f.conj(f.equiv(A[n-i], B[n-i]), X[n-i+1])), 1) )
 
-        return "("+"\n& ".join(res)+")"
+        return res
 
     def _alpha_helper(self, vector1, vector2):
         """ creates the lex-leader constraints between two vectors of variables
             via the Alpha encoding using common sub-expression elimination
             inputs:
-                vector1, vector2: lists of integers, equivalent lengths,
+                vector1, vector2: sequences of integers, equivalent lengths,
                                   each representing a vector of variables
             returns:
-                string containing the full expression of the lex-leader constraint
+                list of formula nodes whose conjunction is the lex-leader constraint
         """
+        f = self.formula
         # setup vectors with 1-based indexing to match constraints in the source paper
-        A = [None] + vector1
-        B = [None] + vector2
+        A = self._vars(vector1)
+        B = self._vars(vector2)
         assert len(vector1) == len(vector2)
         n = len(vector1)
 
         # creating the extra variables
         alpha = dict()
         for i in range(len(vector1)+1):
-            self.num_var += 1
-            alpha[i] = self.num_var
+            alpha[i] = f.var(self._new_var())
 
         res = []
         # alpha[0]   (thesis, 3.66)
-        res.append( "(x{})".format(alpha[0]) )
+        res.append( alpha[0] )
         # 0 <= i <= n−1, -alpha[i] -> -a[i+1]   (thesis, 3.67)
         for i in range(n):
-            res.append( "(!x{} -> !x{})".format(alpha[i], alpha[i+1]) )
+            res.append( f.implies(f.neg(alpha[i]), f.neg(alpha[i+1])) )
         # 1 <= i <= n, alpha[i] -> (A[i] = B[i])   (thesis, 3.68)
         for i in range(1, n+1):
-            res.append( "(x{} -> (x{} = x{}))".format(alpha[i], A[i], B[i]) )
+            res.append( f.implies(alpha[i], f.equiv(A[i], B[i])) )
         # 0 <= i <= n−1, ((alpha[i]) & (!alpha[i+1])) -> (A[i+1] < B[i+1])   (thesis, 3.69)
         for i in range(n):
-            res.append( "((x{} & !x{}) -> (!x{} & x{}))".format(alpha[i], alpha[i+1], A[i+1], B[i+1]) )
+            res.append( f.implies(f.conj(alpha[i], f.neg(alpha[i+1])), self._less(A[i+1], B[i+1])) )
         # 0 <= i <= n−1, alpha[i] -> (A[i+1] <= B[i+1])   (thesis, 3.70)
         for i in range(n):
-            res.append( "(x{} -> (!x{} | x{}))".format(alpha[i], A[i+1], B[i+1]) )
+            res.append( f.implies(alpha[i], self._leq(A[i+1], B[i+1])) )
 
-        return "("+"\n& ".join(res)+")"
+        return res
 
     def _alpha_m_helper(self, vector1, vector2):
         """ creates the lex-leader constraints between two vectors of variables
             via the Alpha M encoding using common sub-expression elimination
             inputs:
-                vector1, vector2: lists of integers, equivalent lengths,
+                vector1, vector2: sequences of integers, equivalent lengths,
                                   each representing a vector of variables
             returns:
-                string containing the full expression of the lex-leader constraint
+                list of formula nodes whose conjunction is the lex-leader constraint
         """
+        f = self.formula
         # setup vectors with 1-based indexing to match constraints in the source paper
-        A = [None] + vector1
-        B = [None] + vector2
+        A = self._vars(vector1)
+        B = self._vars(vector2)
         assert len(vector1) == len(vector2)
         n = len(vector1)
 
         # creating the extra variables
         alpha = dict()
         for i in range(1, len(vector1)+2):
-            self.num_var += 1
-            alpha[i] = self.num_var
+            alpha[i] = f.var(self._new_var())
 
         res = []
         # alpha[1]   (thesis, 3.81)
-        res.append( "(x{})".format(alpha[1]) )
+        res.append( alpha[1] )
         # 1 <= i <= n, alpha[i] <=> (((A[i] < B[i])|alpha[i+1]) & (A[i]<=B[i]))   (thesis, 3.82)
+        # (alpha only occurs positively)
         for i in range(1, n+1):
-            res.append( "(x{0} = (((!x{1} & x{2})|x{3}) & (!x{1} | x{2})))".format(alpha[i], A[i], B[i], alpha[i+1]) )
+            res.append( self._define(alpha[i], f.conj(f.disj(self._less(A[i], B[i]), alpha[i+1]),
+                                                      self._leq(A[i], B[i])), 1) )
 
-        return "("+"\n& ".join(res)+")"
+        return res
 
     def _harvey_helper(self, vector1, vector2):
         """ creates the lex-leader constraints between two vectors of variables
             via the Harvey encoding
             inputs:
-                vector1, vector2: lists of integers, equivalent lengths,
+                vector1, vector2: sequences of integers, equivalent lengths,
                                   each representing a vector of variables
             returns:
-                string containing the full expression of the lex-leader constraint
+                list of formula nodes whose conjunction is the lex-leader constraint
         """
+        f = self.formula
         # setup vectors with 1-based indexing to match constraints in the source paper
-        A = [None] + vector1
-        B = [None] + vector2
+        A = self._vars(vector1)
+        B = self._vars(vector2)
         assert len(vector1) == len(vector2)
         n = len(vector1)
 
         # creating the extra variables
         X = dict()
         for i in range(1, len(vector1)+1):
-            self.num_var += 1
-            X[i] = self.num_var
+            X[i] = f.var(self._new_var())
 
         res = []
         # X[1]   (thesis, 3.54)
-        res.append( "(x{})".format(X[1]) )
+        res.append( X[1] )
         # X[n] <=> (A[n] < (B[n]+1))   (thesis, 3.55)
-        res.append( "(x{} = x{} -> x{})".format(X[n], A[n], B[n]) )
+        # (X only occurs positively)
+        res.append( self._define(X[n], f.implies(A[n], B[n]), 1) )
         # 0 <= i <= n−2, X[n−i−1] <=> (A[n−i−1] < (B[n−i−1] + Bool2Int(X[n−i]))),
         # the right-hand side becomes (B+X)(!A+B)(!A+X)
         for i in range(0, len(vector1)-1):
-            res.append(
-                "(x{XX} = ((x{B} | x{X}) & (!x{A} | x{B}) & (!x{A} | x{X})))".format(
-                    X=X[n-i], XX=X[n-i-1], A=A[n-i-1], B=B[n-i-1]
-                )
-            )
+            XX, X_, A_, B_ = X[n-i-1], X[n-i], A[n-i-1], B[n-i-1]
+            res.append( self._define(XX, f.conj(f.disj(B_, X_), self._leq(A_, B_), self._leq(A_, X_)), 1) )
+
+        return res
+
+
+    def _and_clauses(self, vector1, vector2):
+        """ clause-level counterpart of _and_helper, writing into self.clauses;
+            each (A[j] = B[j]) gets one defined variable E[j]
+        """
+        A = [None, *vector1]
+        B = [None, *vector2]
+        assert len(vector1) == len(vector2)
+        n = len(vector1)
+
+        E = [None] + [self._eq_clauses(A[j], B[j]) for j in range(1, n)]
+
+        self.clauses.add(-A[1], B[1])
+        for i in range(1, n):
+            self.clauses.add(*([-E[j] for j in range(1, i+1)] + [-A[i+1], B[i+1]]))
+
+    def _and_prefix_clauses(self, vector1, vector2):
+        """ clause-level counterpart of _and_prefix_helper, writing into self.clauses;
+            each prefix gets one defined variable P[i] <=> (P[i-1] & E[i])
+        """
+        A = [None, *vector1]
+        B = [None, *vector2]
+        assert len(vector1) == len(vector2)
+        n = len(vector1)
+
+        self.clauses.add(-A[1], B[1])
+        prefix = None
+        for i in range(1, n):
+            prefix = self._extend_prefix_clauses(prefix, self._eq_clauses(A[i], B[i]))
+            self.clauses.add(-prefix, -A[i+1], B[i+1])
+
+    def _and_subexpr_clauses(self, vector1, vector2):
+        """ clause-level counterpart of _and_subexpr_helper, writing into self.clauses """
+        A = [None, *vector1]
+        B = [None, *vector2]
+        assert len(vector1) == len(vector2)
+        n = len(vector1)
+
+        X = dict()
+        for i in range(1, n):
+            X[i] = self._new_var()
+
+        # A[1] <= B[1]   (thesis, 3.18)
+        self.clauses.add(-A[1], B[1])
+        # X[1] <=> (A[1] = B[1])   (thesis, 3.19)
+        used = 2 if self.one_sided else 3
+        if n > 1:
+            self._def_eq_clauses(X[1], A[1], B[1], used)
+        # 1 <= i <= n-2, X[i+1] <=> (X[i] & (A[i+1] = B[i+1]))   (thesis, 3.20)
+        for i in range(1, n-1):
+            self._def_and_eq_clauses(X[i+1], X[i], A[i+1], B[i+1], used)
+        # i <= i <= n-1, X[i] -> (A[i+1] <= B[i+1])   (thesis, 3.21)
+        for i in range(1, n):
+            self.clauses.add(-X[i], -A[i+1], B[i+1])
+
+    def _or_clauses(self, vector1, vector2):
+        """ clause-level counterpart of _or_helper, writing into self.clauses;
+            each (A[j] = B[j]) gets one defined variable E[j] and each
+            disjunct gets one defined variable
+        """
+        A = [None, *vector1]
+        B = [None, *vector2]
+        assert len(vector1) == len(vector2)
+        n = len(vector1)
+
+        E = [None] + [self._eq_clauses(A[j], B[j]) for j in range(1, n+1)]
+
+        terms = [self._conj_clauses([-A[1], B[1]])]
+        for i in range(1, n):
+            terms.append(self._conj_clauses(E[1:i+1] + [-A[i+1], B[i+1]]))
+        terms.append(self._conj_clauses(E[1:n+1]))
+        self.clauses.add(*terms)
+
+    def _or_prefix_clauses(self, vector1, vector2):
+        """ clause-level counterpart of _or_prefix_helper, writing into self.clauses """
+        A = [None, *vector1]
+        B = [None, *vector2]
+        assert len(vector1) == len(vector2)
+        n = len(vector1)
+
+        terms = [self._conj_clauses([-A[1], B[1]])]
+        prefix = None
+        for i in range(1, n):
+            prefix = self._extend_prefix_clauses(prefix, self._eq_clauses(A[i], B[i]))
+            terms.append(self._conj_clauses([prefix, -A[i+1], B[i+1]]))
+        terms.append(self._extend_prefix_clauses(prefix, self._eq_clauses(A[n], B[n])))
+        self.clauses.add(*terms)
+
+    def _or_subexpr_clauses(self, vector1, vector2):
+        """ clause-level counterpart of _or_subexpr_helper, writing into self.clauses """
+        A = [None, *vector1]
+        B = [None, *vector2]
+        assert len(vector1) == len(vector2)
+        n = len(vector1)
+
+        X = dict()
+        for i in range(1, n+1):
+            X[i] = self._new_var()
+
+        # A[1] < B[1] | 1 <= i <= n-1, X[i] & (A[i+1] < B[i+1])) | X[n]
+        terms = [self._conj_clauses([-A[1], B[1]])]
+        for i in range(1, n):
+            terms.append(self._conj_clauses([X[i], -A[i+1], B[i+1]]))
+        terms.append(X[n])
+        self.clauses.add(*terms)
+
+        # X[1] <=> A[1] = B[1]   (thesis, 3.36)
+        used = 1 if self.one_sided else 3
+        self._def_eq_clauses(X[1], A[1], B[1], used)
+        # 1 <= i <= n−1, X[i+1] <=> (X[i] & (A[i+1] = B[i+1]))   (thesis, 3.37)
+        for i in range(1, n):
+            self._def_and_eq_clauses(X[i+1], X[i], A[i+1], B[i+1], used)
+
+    def _ror_clauses(self, vector1, vector2):
+        """ clause-level counterpart of _ror_helper, writing into self.clauses """
+        A = [None, *vector1]
+        B = [None, *vector2]
+        assert len(vector1) == len(vector2)
+        n = len(vector1)
+
+        X = dict()
+        for i in range(1, n+1):
+            X[i] = self._new_var()
+
+        # X[1]   (thesis, 3.44)
+        self.clauses.add(X[1])
+        # X[n] <=> (A[n] <= B[n])   (thesis, 3.45)
+        used = 1 if self.one_sided else 3
+        self.clauses.add(-X[n], -A[n], B[n])
+        if used & 2:
+            self.clauses.add(X[n], A[n])
+            self.clauses.add(X[n], -B[n])
+        # 1 <= i <= n−1, X[n−i] <=> (A[n−i]<B[n−i] | (A[n−i]=B[n−i] & X[n−i+1]))   (thesis, 3.46)
+        for i in range(1, n):
+            self._def_leq_clauses(X[n-i], A[n-i], B[n-i], X[n-i+1], used)
+
+    def _alpha_clauses(self, vector1, vector2):
+        """ clause-level counterpart of _alpha_helper, writing into self.clauses """
+        A = [None, *vector1]
+        B = [None, *vector2]
+        assert len(vector1) == len(vector2)
+        n = len(vector1)
+
+        alpha = dict()
+        for i in range(n+1):
+            alpha[i] = self._new_var()
+
+        # alpha[0]   (thesis, 3.66)
+        self.clauses.add(alpha[0])
+        # 0 <= i <= n−1, -alpha[i] -> -a[i+1]   (thesis, 3.67)
+        for i in range(n):
+            self.clauses.add(alpha[i], -alpha[i+1])
+        # 1 <= i <= n, alpha[i] -> (A[i] = B[i])   (thesis, 3.68)
+        for i in range(1, n+1):
+            self.clauses.add(-alpha[i], -A[i], B[i])
+            self.clauses.add(-alpha[i], A[i], -B[i])
+        # 0 <= i <= n−1, ((alpha[i]) & (!alpha[i+1])) -> (A[i+1] < B[i+1])   (thesis, 3.69)
+        for i in range(n):
+            self.clauses.add(-alpha[i], alpha[i+1], -A[i+1])
+            self.clauses.add(-alpha[i], alpha[i+1], B[i+1])
+        # 0 <= i <= n−1, alpha[i] -> (A[i+1] <= B[i+1])   (thesis, 3.70)
+        for i in range(n):
+            self.clauses.add(-alpha[i], -A[i+1], B[i+1])
+
+    def _alpha_m_clauses(self, vector1, vector2):
+        """ clause-level counterpart of _alpha_m_helper, writing into self.clauses """
+        A = [None, *vector1]
+        B = [None, *vector2]
+        assert len(vector1) == len(vector2)
+        n = len(vector1)
+
+        alpha = dict()
+        for i in range(1, n+2):
+            alpha[i] = self._new_var()
+
+        # alpha[1]   (thesis, 3.81)
+        self.clauses.add(alpha[1])
+        # 1 <= i <= n, alpha[i] <=> (((A[i] < B[i])|alpha[i+1]) & (A[i]<=B[i]))   (thesis, 3.82)
+        used = 1 if self.one_sided else 3
+        for i in range(1, n+1):
+            self._def_leq_clauses(alpha[i], A[i], B[i], alpha[i+1], used)
+
+    def _harvey_clauses(self, vector1, vector2):
+        """ clause-level counterpart of _harvey_helper, writing into self.clauses """
+        A = [None, *vector1]
+        B = [None, *vector2]
+        assert len(vector1) == len(vector2)
+        n = len(vector1)
+
+        X = dict()
+        for i in range(1, n+1):
+            X[i] = self._new_var()
+
+        # X[1]   (thesis, 3.54)
+        self.clauses.add(X[1])
+        # X[n] <=> (A[n] < (B[n]+1))   (thesis, 3.55)
+        used = 1 if self.one_sided else 3
+        self.clauses.add(-X[n], -A[n], B[n])
+        if used & 2:
+            self.clauses.add(X[n], A[n])
+            self.clauses.add(X[n], -B[n])
+        # 0 <= i <= n−2, X[n−i−1] <=> (B[n−i−1] | X[n−i]) & (!A[n−i−1] | B[n−i−1]) & (!A[n−i−1] | X[n−i])
+        for i in range(0, n-1):
+            self._def_leq_clauses(X[n-i-1], A[n-i-1], B[n-i-1], X[n-i], used)
+
+    def _eq_clauses(self, a, b):
+        """ returns a fresh variable e with e <=> (a = b) """
+        e = self._new_var()
+        self._def_eq_clauses(e, a, b)
+        return e
+
+    def _extend_prefix_clauses(self, prefix, lit):
+        if prefix is None:
+            return lit
+        return self._conj_clauses([prefix, lit])
+
+    def _conj_clauses(self, lits):
+        """ returns a fresh variable t with t <=> (lits[0] & lits[1] & ...) """
+        t = self._new_var()
+        for lit in lits:
+            self.clauses.add(-t, lit)
+        self.clauses.add(t, *[-lit for lit in lits])
+        return t
+
+    # In the _def_*_clauses methods, used is a bitmask of the polarities x
+    # occurs in (1 = positive, 2 = negative, as in Formula.polarities()):
+    # x -> definition is only emitted for 1 and definition -> x only for 2.
+
+    def _def_eq_clauses(self, x, a, b, used=3):
+        """ x <=> (a = b) """
+        if used & 1:
+            self.clauses.add(-x, -a, b)
+            self.clauses.add(-x, a, -b)
+        if used & 2:
+            self.clauses.add(x, a, b)
+            self.clauses.add(x, -a, -b)
+
+    def _def_and_eq_clauses(self, x, y, a, b, used=3):
+        """ x <=> (y & (a = b)) """
+        if used & 1:
+            self.clauses.add(-x, y)
+            self.clauses.add(-x, -a, b)
+            self.clauses.add(-x, a, -b)
+        if used & 2:
+            self.clauses.add(x, -y, a, b)
+            self.clauses.add(x, -y, -a, -b)
+
+    def _def_leq_clauses(self, x, a, b, y, used=3):
+        """ x <=> ((!a & b) | ((a = b) & y)), i.e. x is the majority of
+            !a, b and y; shared by the ror, alpha-m and harvey recurrences
+        """
+        if used & 1:
+            # x -> (!a | b) & (!a | y) & (b | y)
+            self.clauses.add(-x, -a, b)
+            self.clauses.add(-x, -a, y)
+            self.clauses.add(-x, b, y)
+        if used & 2:
+            # !x -> (a | !b) & (a | !y) & (!b | !y)
+            self.clauses.add(x, a, -b)
+            self.clauses.add(x, a, -y)
+            self.clauses.add(x, -b, -y)
+
+
+def _bool2cnf_size(formula):
+    """ the (variables, clauses, literals) of bool2cnf's conversion of a
+        formula string
+    """
+    num_var = num_clauses = num_lits = 0
+    for line in cnfpool.convert_lines(formula):
+        if line.startswith("p"):
+            num_var, num_clauses = [int(x) for x in line.split()[2:4]]
+        elif line.strip() and not line.startswith("c"):
+            num_lits += len(line.split()) - 1
+    return num_var, num_clauses, num_lits
+
+
+class Encoder:
+    """ a lex-leader encoding of one vector pair
+        formula(lex, vector1, vector2): the constraint as formula nodes of lex.formula
+        clauses(lex, vector1, vector2): the constraint added to lex.clauses
+        aux_vars(n), num_clauses(n): auxiliary variables and clauses of the
+            clause version for one pair of length-n vectors (n >= 2)
+        cse: the encoding defines shared sub-expressions as auxiliary variables
+        one_sided: those definitions are emitted in one direction only
+    """
+    __slots__ = ("formula", "clauses", "aux_vars", "num_clauses", "cse", "one_sided")
+
+    def __init__(self, formula, clauses, aux_vars, num_clauses, cse=False, one_sided=False):
+        self.formula = formula
+        self.clauses = clauses
+        self.aux_vars = aux_vars
+        self.num_clauses = num_clauses
+        self.cse = cse
+        self.one_sided = one_sided
+
+
+# the options LexLeader accepts, by name
+ENCODERS = dict()
+
+
+def register_encoder(name, encoder):
+    """ make encoder available as the lex-leader option name """
+    if ":" in name:
+        raise ValueError("option name {!r} must not contain ':'".format(name))
+    ENCODERS[name] = encoder
+
+
+def cheapest_encoders(lengths, count=None):
+    """ the registered options ordered by the clauses, then the auxiliary
+        variables, they need for vector pairs of the given lengths
+    """
+    def cost(name):
+        encoder = ENCODERS[name]
+        return (sum(encoder.num_clauses(n) for n in lengths), sum(encoder.aux_vars(n) for n in lengths), name)
+    return sorted(ENCODERS, key=cost)[:count]
+
 
-        return "("+"\n& ".join(res)+")"
+register_encoder("and", Encoder(LexLeader._and_helper, LexLeader._and_clauses,
+                                lambda n: n-1, lambda n: 5*n-4))
+register_encoder("and-cse", Encoder(LexLeader._and_subexpr_helper, LexLeader._and_subexpr_clauses,
+                                    lambda n: n-1, lambda n: 6*n-6, cse=True))
+register_encoder("and-prefix", Encoder(LexLeader._and_prefix_helper, LexLeader._and_prefix_clauses,
+                                       lambda n: 2*n-3, lambda n: 8*n-10))
+register_encoder("or", Encoder(LexLeader._or_helper, LexLeader._or_clauses,
+                               lambda n: 2*n+1, lambda n: (n*n+15*n+4)//2))
+register_encoder("or-cse", Encoder(LexLeader._or_subexpr_helper, LexLeader._or_subexpr_clauses,
+                                   lambda n: 2*n, lambda n: 9*n-1, cse=True))
+register_encoder("or-prefix", Encoder(LexLeader._or_prefix_helper, LexLeader._or_prefix_clauses,
+                                      lambda n: 3*n-1, lambda n: 11*n-3))
+register_encoder("ror", Encoder(LexLeader._ror_helper, LexLeader._ror_clauses,
+                                lambda n: n, lambda n: 6*n-2, cse=True))
+register_encoder("alpha", Encoder(LexLeader._alpha_helper, LexLeader._alpha_clauses,
+                                  lambda n: n+1, lambda n: 6*n+1))
+register_encoder("alpha-m", Encoder(LexLeader._alpha_m_helper, LexLeader._alpha_m_clauses,
+                                    lambda n: n+1, lambda n: 6*n+1, cse=True))
+register_encoder("harvey", Encoder(LexLeader._harvey_helper, LexLeader._harvey_clauses,
+                                   lambda n: n, lambda n: 6*n-2, cse=True))
+register_encoder("and-cse-pg", Encoder(LexLeader._and_subexpr_helper, LexLeader._and_subexpr_clauses,
+                                       lambda n: n-1, lambda n: 3*n-2, cse=True, one_sided=True))
+register_encoder("or-cse-pg", Encoder(LexLeader._or_subexpr_helper, LexLeader._or_subexpr_clauses,
+                                      lambda n: 2*n, lambda n: 7*n-1, cse=True, one_sided=True))
+register_encoder("ror-pg", Encoder(LexLeader._ror_helper, LexLeader._ror_clauses,
+                                   lambda n: n, lambda n: 3*n-1, cse=True, one_sided=True))
+register_encoder("alpha-m-pg", Encoder(LexLeader._alpha_m_helper, LexLeader._alpha_m_clauses,
+                                       lambda n: n+1, lambda n: 3*n+1, cse=True, one_sided=True))
+register_encoder("harvey-pg", Encoder(LexLeader._harvey_helper, LexLeader._harvey_clauses,
+                                      lambda n: n, lambda n: 3*n-1, cse=True, one_sided=True))
+# propagated by the solver itself (MinicardSolver.add_lex_leq), see LexLeader.post_lexleader()
+register_encoder("native", Encoder(None, None, lambda n: 0, lambda n: 0))
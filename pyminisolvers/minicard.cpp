@@ -1,3 +1,4 @@
+#include <cstring>
 #include "minicard/minicard/Solver.h"
 
 using namespace Minisat;
@@ -42,6 +43,27 @@ extern "C" {
         }
         return s->addAtMost(atmost, k);
     }
+    // Adds n AtMost constraints, constraint i being SUM(lits[offsets[i]] to
+    // lits[offsets[i+1]-1]) <= ks[i]; stops at the first conflict, returning false.
+    bool addAtMosts(Solver* s, int n, int* lits, int* offsets, int* ks) {
+        vec<Lit> atmost;
+        for (int i = 0 ; i < n ; i++) {
+            atmost.clear();
+            for (int j = offsets[i] ; j < offsets[i+1] ; j++) {
+                atmost.push( itoLit(lits[j]) );
+            }
+            if (!s->addAtMost_(atmost, ks[i])) return false;
+        }
+        return true;
+    }
+    bool addLexLeq(Solver* s, int len, int* lits1, int* lits2) {
+        vec<Lit> as, bs;
+        for (int i = 0 ; i < len ; i++) {
+            as.push( itoLit(lits1[i]) );
+            bs.push( itoLit(lits2[i]) );
+        }
+        return s->addLexLeq(as, bs);
+    }
     bool addClause(Solver* s, int len, int* lits) {
         vec<Lit> clause;
         for (int i = 0 ; i < len ; i++) {
@@ -52,6 +74,19 @@ extern "C" {
     bool addUnit(Solver* s, int lit) {
         return s->addClause(itoLit(lit));
     }
+    // Adds n clauses, clause i being lits[offsets[i]] to lits[offsets[i+1]-1];
+    // stops at the first conflict, returning false.
+    bool addClauses(Solver* s, int n, int* lits, int* offsets) {
+        vec<Lit> clause;
+        for (int i = 0 ; i < n ; i++) {
+            clause.clear();
+            for (int j = offsets[i] ; j < offsets[i+1] ; j++) {
+                clause.push( itoLit(lits[j]) );
+            }
+            if (!s->addClause_(clause)) return false;
+        }
+        return true;
+    }
 
     bool solve(Solver* s) { return s->solve(); }
     bool solve_assumptions(Solver* s, int len, int* lits) {
@@ -61,6 +96,25 @@ extern "C" {
         }
         return s->solve(assumptions);
     }
+    // Like solve_assumptions(), but returns early once the solver has spent
+    // conf_budget more conflicts or prop_budget more propagations (-1 for no
+    // limit), or if interrupt() is called meanwhile (or already was):
+    // 1 if satisfiable, 0 if not, -1 if stopped early.
+    int solve_limited(Solver* s, int len, int* lits, int64_t conf_budget, int64_t prop_budget) {
+        vec<Lit> assumptions;
+        for (int i = 0 ; i < len ; i++) {
+            assumptions.push( itoLit(lits[i]) );
+        }
+        s->budgetOff();
+        if (conf_budget >= 0) s->setConfBudget(conf_budget);
+        if (prop_budget >= 0) s->setPropBudget(prop_budget);
+        lbool ret = s->solveLimited(assumptions);
+        s->budgetOff();
+        return (ret == l_True) ? 1 : (ret == l_False) ? 0 : -1;
+    }
+    // May be called from another thread while the solver is searching.
+    void interrupt(Solver* s) { s->interrupt(); }
+    void clearInterrupt(Solver* s) { s->clearInterrupt(); }
     bool check_complete(Solver* s, const int len, const int* lits, const bool pos) {
         int n = s->nVars();
         vec<Lit> assumptions;
@@ -99,6 +153,47 @@ extern "C" {
         return count;
     }
 
+    // Finds up to limit further models under the assumptions, blocking each
+    // one on the projection vars (1-based) so no two have the same projection.
+    // The value of vars[j] in model i is bit j%8 of models[i*stride + j/8],
+    // stride = (len+7)/8.  Returns the number of models found; *exhausted is
+    // set once there are no more under the assumptions.  An interrupt() stops
+    // the search early, with *exhausted left unset.
+    int enumerateModels(Solver* s, int len, int* vars, int nassumps, int* assumps, int limit,
+                        uint8_t* models, bool* exhausted) {
+        const int stride = (len + 7) / 8;
+        vec<Lit> assumptions;
+        for (int i = 0 ; i < nassumps ; i++) {
+            assumptions.push( itoLit(assumps[i]) );
+        }
+        vec<Lit> block;
+        *exhausted = false;
+        int count = 0;
+        s->budgetOff();
+        while (count < limit) {
+            lbool ret = s->solveLimited(assumptions);
+            if (ret == l_Undef) break;
+            if (ret == l_False) {
+                *exhausted = true;
+                break;
+            }
+            uint8_t* model = models + count*stride;
+            memset(model, 0, stride);
+            block.clear();
+            for (int j = 0 ; j < len ; j++) {
+                bool value = s->modelValue(vars[j]-1) == l_True;
+                if (value) model[j/8] |= 1 << (j%8);
+                block.push( mkLit(vars[j]-1, value) );
+            }
+            count++;
+            if (!s->addClause_(block)) {
+                *exhausted = true;
+                break;
+            }
+        }
+        return count;
+    }
+
     // returns the size of the current conflict
     int conflictSize(Solver* s) {
         return s->conflict.size();
@@ -98,6 +98,7 @@ Solver::Solver() :
   , order_heap         (VarOrderLt(activity))
   , progress_estimate  (0)
   , remove_satisfied   (true)
+  , lex_qhead          (0)
 
     // Resource constraints:
     //
@@ -129,6 +130,7 @@ Var Solver::newVar(bool sign, bool dvar)
     //activity .push(0);
     activity .push(rnd_init_act ? drand(random_seed) * 0.00001 : 0);
     seen     .push(0);
+    lex_occurs.push();
     polarity .push(sign);
     decision .push();
     trail    .capacity(v+1);
@@ -245,6 +247,30 @@ bool Solver::addAtMost_(vec<Lit>& ps, int k) {
 }
 
 
+bool Solver::addLexLeq(const vec<Lit>& as, const vec<Lit>& bs)
+{
+    assert(decisionLevel() == 0);
+    assert(as.size() == bs.size());
+    if (!ok) return false;
+    if (as.size() == 0) return true;
+
+    int c = lex_start.size();
+    lex_start.push(lex_lits.size());
+    lex_size .push(as.size());
+    for (int i = 0; i < as.size(); i++) lex_lits.push(as[i]);
+    for (int i = 0; i < bs.size(); i++) lex_lits.push(bs[i]);
+    for (int i = 0; i < as.size(); i++){
+        lex_occurs[var(as[i])].push(c);
+        if (var(bs[i]) != var(as[i]))
+            lex_occurs[var(bs[i])].push(c); }
+
+    // Propagate it once against the current top-level assignment:
+    lex_queued.push(1);
+    lex_queue .push(c);
+    return ok = (propagate() == CRef_Undef);
+}
+
+
 void Solver::attachClause(CRef cr) {
     const Clause& c = ca[cr];
     if (c.is_atmost()) {
@@ -347,6 +373,11 @@ void Solver::cancelUntil(int level) {
                 polarity[x] = sign(trail[c]);
             insertVarOrder(x); }
         qhead = trail_lim[level];
+        if (lex_qhead > qhead) lex_qhead = qhead;
+        while (lex_reason_lim.size() > 0 && lex_reason_lim.last() > level){
+            ca.free(lex_reasons.last());
+            lex_reasons.pop();
+            lex_reason_lim.pop(); }
         trail.shrink(trail.size() - trail_lim[level]);
         trail_lim.shrink(trail_lim.size() - level);
     } }
@@ -702,6 +733,22 @@ Lit Solver::findNewWatch(CRef cr, Lit p) {
 |      * the propagation queue is empty, even if there was a conflict.
 |________________________________________________________________________________________________@*/
 CRef Solver::propagate()
+{
+    for (;;){
+        CRef confl = propagateClauses();
+        if (confl != CRef_Undef || lex_start.size() == 0)
+            return confl;
+
+        // Clauses are at fixpoint; let the lex constraints act on the new facts:
+        int trail_before = trail.size();
+        confl = propagateLex();
+        if (confl != CRef_Undef || trail.size() == trail_before)
+            return confl;
+    }
+}
+
+
+CRef Solver::propagateClauses()
 {
     CRef    confl     = CRef_Undef;
     int     num_props = 0;
@@ -807,6 +854,152 @@ CRef Solver::propagate()
 }
 
 
+/*_________________________________________________________________________________________________
+|
+|  propagateLex : [void]  ->  [Clause*]
+|  
+|  Description:
+|    Propagates the lex constraints 'as <=lex bs' mentioning a variable assigned since the last
+|    call. Each constraint is checked from its first position: once the positions before 'alpha'
+|    are fixed equal, 'as[alpha] <= bs[alpha]' must hold, and if the remaining positions are
+|    already fixed to 'as > bs', then 'as[alpha] < bs[alpha]' must. Every implication and conflict
+|    is explained by a clause built from the assignments that caused it, so conflict analysis
+|    treats the constraint like any other clause. These clauses are not watched or kept among
+|    the learnts: they are freed when backtracking undoes the implication (see 'lexReason()').
+|  
+|    Post-conditions:
+|      * the lex queue is empty, even if there was a conflict.
+|________________________________________________________________________________________________@*/
+CRef Solver::propagateLex()
+{
+    for (; lex_qhead < trail.size(); lex_qhead++){
+        const vec<int>& cs = lex_occurs[var(trail[lex_qhead])];
+        for (int i = 0; i < cs.size(); i++)
+            if (!lex_queued[cs[i]]){
+                lex_queued[cs[i]] = 1;
+                lex_queue.push(cs[i]); }
+    }
+
+    CRef confl = CRef_Undef;
+    while (lex_queue.size() > 0 && confl == CRef_Undef){
+        int c = lex_queue.last();
+        lex_queue.pop();
+        lex_queued[c] = 0;
+        confl = propagateLexLeq(c);
+    }
+
+    if (confl != CRef_Undef){
+        for (int i = 0; i < lex_queue.size(); i++)
+            lex_queued[lex_queue[i]] = 0;
+        lex_queue.clear();
+    }
+    return confl;
+}
+
+
+CRef Solver::propagateLexLeq(int c)
+{
+    const int  n  = lex_size[c];
+    const Lit* as = &lex_lits[lex_start[c]];
+    const Lit* bs = as + n;
+
+    int alpha = 0;
+    while (alpha < n && fixedEqual(as[alpha], bs[alpha]))
+        alpha++;
+    if (alpha == n)
+        return CRef_Undef;      // 'as' equals 'bs'
+
+    lbool va = value(as[alpha]);
+    lbool vb = value(bs[alpha]);
+    if (va == l_False && vb == l_True)
+        return CRef_Undef;      // 'as' is already smaller
+
+    lex_tmp.clear();
+    if (va == l_True && vb == l_False){
+        // 'as' is already larger:
+        lex_tmp.push(~as[alpha]);
+        lex_tmp.push(bs[alpha]);
+        lexExplainEqual(as, bs, 0, alpha, lex_tmp);
+        return lexReason(lex_tmp, true);
+    }
+
+    if (va == l_True || vb == l_False){
+        // 'as[alpha] <= bs[alpha]' fixes the other one:
+        if (va == l_True){
+            lex_tmp.push(bs[alpha]);
+            lex_tmp.push(~as[alpha]);
+        }else{
+            lex_tmp.push(~as[alpha]);
+            lex_tmp.push(bs[alpha]); }
+        lexExplainEqual(as, bs, 0, alpha, lex_tmp);
+        lexEnqueue(lex_tmp);
+        return CRef_Undef;
+    }
+
+    // If the rest is fixed to 'as > bs', position 'alpha' has to decide it: 'as[alpha] < bs[alpha]'.
+    int beta = alpha + 1;
+    while (beta < n && fixedEqual(as[beta], bs[beta]))
+        beta++;
+    if (beta == n || value(as[beta]) != l_True || value(bs[beta]) != l_False)
+        return CRef_Undef;
+
+    for (int i = 0; i < 2; i++){
+        Lit p = (i == 0) ? ~as[alpha] : bs[alpha];
+        if (value(p) != l_Undef)
+            continue;
+        lex_tmp.clear();
+        lex_tmp.push(p);
+        lexExplainEqual(as, bs, 0, alpha, lex_tmp);
+        lexExplainEqual(as, bs, alpha+1, beta, lex_tmp);
+        lex_tmp.push(~as[beta]);
+        lex_tmp.push(bs[beta]);
+        lexEnqueue(lex_tmp);
+    }
+    return CRef_Undef;
+}
+
+
+void Solver::lexExplainEqual(const Lit* as, const Lit* bs, int from, int to, vec<Lit>& out)
+{
+    for (int i = from; i < to; i++){
+        if (as[i] == bs[i])
+            continue;
+        out.push(value(as[i]) == l_True ? ~as[i] : as[i]);
+        out.push(value(bs[i]) == l_True ? ~bs[i] : bs[i]);
+    }
+}
+
+
+// Store the explanation 'ps' as a reason clause for conflict analysis only. For an implication
+// 'ps[0]' is the implied literal and stays first; the remaining (false) literals are deduplicated.
+// The clause is neither watched nor learnt: 'cancelUntil()' frees it once the decision level it
+// was made at is undone, and 'search()' collects the freed space.
+CRef Solver::lexReason(vec<Lit>& ps, bool conflict)
+{
+    int first = conflict ? 0 : 1;
+    sort((Lit*)ps + first, ps.size() - first);
+    int i, j;
+    for (i = j = first; i < ps.size(); i++)
+        if (j == first || ps[i] != ps[j-1])
+            ps[j++] = ps[i];
+    ps.shrink(i - j);
+
+    CRef cr = ca.alloc(ps, false);
+    lex_reasons.push(cr);
+    lex_reason_lim.push(decisionLevel());
+    return cr;
+}
+
+
+void Solver::lexEnqueue(vec<Lit>& ps)
+{
+    if (decisionLevel() == 0)
+        uncheckedEnqueue(ps[0]);
+    else
+        uncheckedEnqueue(ps[0], lexReason(ps, false));
+}
+
+
 /*_________________________________________________________________________________________________
 |
 |  reduceDB : ()  ->  [void]
@@ -930,6 +1123,8 @@ lbool Solver::search(int nof_conflicts)
             learnt_clause.clear();
             analyze(confl, learnt_clause, backtrack_level);
             cancelUntil(backtrack_level);
+            if (lex_start.size() > 0)
+                checkGarbage();     // (reclaim the lex reasons just freed)
 
             if (learnt_clause.size() == 1){
                 uncheckedEnqueue(learnt_clause[0]);
@@ -1226,6 +1421,11 @@ void Solver::relocAll(ClauseAllocator& to)
             ca.reloc(vardata[v].reason, to);
     }
 
+    // All lex reasons (the reasons loop above already moved those still in use):
+    //
+    for (int i = 0; i < lex_reasons.size(); i++)
+        ca.reloc(lex_reasons[i], to);
+
     // All learnt:
     //
     for (int i = 0; i < learnts.size(); i++)
@@ -64,6 +64,7 @@ public:
     bool    addAtMost (const vec<Lit>& ps, int k);         // Add an AtMost cardinality constraint: SUM(ps) <= k
     bool    addAtMost_(      vec<Lit>& ps, int k);         // Add an AtMost cardinality constraint to the solver without making superflous internal copy.
                                                            // Will change the passed vector 'ps'.
+    bool    addLexLeq (const vec<Lit>& as, const vec<Lit>& bs); // Add a lexicographic ordering constraint: as <=lex bs (false < true, first position most significant)
 
     // Solving:
     //
@@ -217,6 +218,19 @@ protected:
     vec<Lit>            analyze_stack;
     vec<Lit>            analyze_toclear;
     vec<Lit>            add_tmp;
+    vec<Lit>            lex_tmp;
+
+    // Lexicographic ordering constraints (see 'addLexLeq()'):
+    //
+    vec<Lit>            lex_lits;         // Literals of all lex constraints; constraint 'c' stores its 'as' then its 'bs' from 'lex_start[c]'.
+    vec<int>            lex_start;        // Index of the first literal of each lex constraint in 'lex_lits'.
+    vec<int>            lex_size;         // Length of the vectors of each lex constraint.
+    vec<vec<int> >      lex_occurs;       // 'lex_occurs[v]' lists the lex constraints mentioning variable 'v'.
+    vec<int>            lex_queue;        // Lex constraints waiting to be propagated.
+    vec<char>           lex_queued;       // Whether a lex constraint is in 'lex_queue'.
+    int                 lex_qhead;        // Head of the trail as seen by the lex propagator.
+    vec<CRef>           lex_reasons;      // Explanations of the lex implications and conflicts on the trail; freed on backtracking.
+    vec<int>            lex_reason_lim;   // Decision level at which each of 'lex_reasons' was made.
 
     double              max_learnts;
     double              learntsize_adjust_confl;
@@ -236,6 +250,12 @@ protected:
     void     uncheckedEnqueue (Lit p, CRef from = CRef_Undef);                         // Enqueue a literal. Assumes value of literal is undefined.
     bool     enqueue          (Lit p, CRef from = CRef_Undef);                         // Test if fact 'p' contradicts current state, enqueue otherwise.
     CRef     propagate        ();                                                      // Perform unit propagation. Returns possibly conflicting clause.
+    CRef     propagateClauses ();                                                      // Unit propagation over clauses and AtMosts only.
+    CRef     propagateLex     ();                                                      // Propagate the lex constraints touched since the last call.
+    CRef     propagateLexLeq  (int c);                                                 // Propagate lex constraint 'c'. Returns a conflicting clause, if any.
+    void     lexExplainEqual  (const Lit* as, const Lit* bs, int from, int to, vec<Lit>& out); // Add the false literals fixing 'as[from..to)' equal to 'bs[from..to)'.
+    CRef     lexReason        (vec<Lit>& ps, bool conflict);                           // Turn an explanation into a temporary reason clause.
+    void     lexEnqueue       (vec<Lit>& ps);                                          // Enqueue 'ps[0]' with the explanation 'ps'.
     Lit      findNewWatch     (CRef cr, Lit p);                                        // Find a new watched lit for an AtMost
     void     cancelUntil      (int level);                                             // Backtrack until a certain level.
     void     analyze          (CRef confl, vec<Lit>& out_learnt, int& out_btlevel);    // (bt = backtrack)
@@ -263,6 +283,7 @@ protected:
     void     removeClause     (CRef cr);               // Detach and free a clause.
     bool     locked           (const Clause& c) const; // Returns TRUE if a clause is a reason for some implication in the current state.
     bool     satisfied        (const Clause& c) const; // Returns TRUE if a clause is satisfied in the current state.
+    bool     fixedEqual       (Lit p, Lit q) const;    // Returns TRUE if 'p' and 'q' must have the same value in the current state.
 
     void     relocAll         (ClauseAllocator& to);
 
@@ -341,6 +362,7 @@ inline int      Solver::decisionLevel ()      const   { return trail_lim.size();
 inline uint32_t Solver::abstractLevel (Var x) const   { return 1 << (level(x) & 31); }
 inline lbool    Solver::value         (Var x) const   { return assigns[x]; }
 inline lbool    Solver::value         (Lit p) const   { return assigns[var(p)] ^ sign(p); }
+inline bool     Solver::fixedEqual    (Lit p, Lit q) const { return p == q || (value(p) != l_Undef && value(p) == value(q)); }
 inline lbool    Solver::modelValue    (Var x) const   { return model[x]; }
 inline lbool    Solver::modelValue    (Lit p) const   { return model[var(p)] ^ sign(p); }
 inline int      Solver::nAssigns      ()      const   { return trail.size(); }
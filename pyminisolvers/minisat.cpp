@@ -45,6 +45,19 @@ extern "C" {
     bool addUnit(Solver* s, int lit) {
         return s->addClause(itoLit(lit));
     }
+    // Adds n clauses, clause i being lits[offsets[i]] to lits[offsets[i+1]-1];
+    // stops at the first conflict, returning false.
+    bool addClauses(Solver* s, int n, int* lits, int* offsets) {
+        vec<Lit> clause;
+        for (int i = 0 ; i < n ; i++) {
+            clause.clear();
+            for (int j = offsets[i] ; j < offsets[i+1] ; j++) {
+                clause.push( itoLit(lits[j]) );
+            }
+            if (!s->addClause_(clause)) return false;
+        }
+        return true;
+    }
 
     bool solve(Solver* s) { return s->solve(); }
     bool solve_assumptions(Solver* s, int len, int* lits) {
@@ -54,6 +67,25 @@ extern "C" {
         }
         return s->solve(assumptions);
     }
+    // Like solve_assumptions(), but returns early once the solver has spent
+    // conf_budget more conflicts or prop_budget more propagations (-1 for no
+    // limit), or if interrupt() is called meanwhile (or already was):
+    // 1 if satisfiable, 0 if not, -1 if stopped early.
+    int solve_limited(Solver* s, int len, int* lits, int64_t conf_budget, int64_t prop_budget) {
+        vec<Lit> assumptions;
+        for (int i = 0 ; i < len ; i++) {
+            assumptions.push( itoLit(lits[i]) );
+        }
+        s->budgetOff();
+        if (conf_budget >= 0) s->setConfBudget(conf_budget);
+        if (prop_budget >= 0) s->setPropBudget(prop_budget);
+        lbool ret = s->solveLimited(assumptions);
+        s->budgetOff();
+        return (ret == l_True) ? 1 : (ret == l_False) ? 0 : -1;
+    }
+    // May be called from another thread while the solver is searching.
+    void interrupt(Solver* s) { s->interrupt(); }
+    void clearInterrupt(Solver* s) { s->clearInterrupt(); }
     bool check_complete(Solver* s, const int len, const int* lits, const bool pos) {
         int n = s->nVars();
         vec<Lit> assumptions;
@@ -18,11 +18,20 @@ Classes:
     An abstract base class for the other classes.
   SubsetMixin
     A mixin class adding 'subset' functionality to Solver subclasses.
+
+  `SolverPool`
+    Hands out new solvers of one class, constructed ahead of time.
+
+Functions:
+  `race`
+    Solve with several solvers in parallel threads, stopping at the first result.
 """
 
 import array
 import os
+import threading
 import ctypes  # type: ignore
+from concurrent.futures import Future, wait, FIRST_COMPLETED
 from abc import ABCMeta, abstractmethod
 from ctypes import c_void_p, c_ubyte, c_bool, c_int, c_int64, c_double  # type: ignore
 
@@ -47,25 +56,33 @@ class Solver(object):
 
     __metaclass__ = ABCMeta
 
+    # loaded libraries by file name, set up once per process and shared by
+    # all solvers using them
+    _libs = {}  # type: typing.Dict[str, ctypes.CDLL]
+
     @abstractmethod
     def __init__(self, libfilename):  # type: (str) -> None
-        self._setup_lib(libfilename)
+        lib = Solver._libs.get(libfilename)
+        if lib is None:
+            lib = Solver._libs[libfilename] = self._setup_lib(libfilename)
+        self.lib = lib
         self.s = self.lib.Solver_new()
-
-    def _setup_lib(self, libfilename):  # type: (str) -> None
-        """Load the minisat library with ctypes and create a Solver
-           object.  Correct return types (if not int as assumed by
-           ctypes) and set argtypes for functions from the minisat
-           library.
+        # whether interrupt() was called, as opposed to a time budget running out
+        self._interrupted = False
+        self._interrupt_lock = threading.Lock()
+
+    @classmethod
+    def _setup_lib(cls, libfilename):  # type: (str) -> ctypes.CDLL
+        """Load the minisat library with ctypes.  Correct return types (if
+           not int as assumed by ctypes) and set argtypes for functions
+           from the minisat library.  Called once per library file.
         """
         dirname = os.path.dirname(os.path.abspath(__file__))
         libfile = os.path.join(dirname, libfilename)
         if not os.path.exists(libfile):
             raise IOError("Specified library file not found.  Did you run 'make' to build the solver libraries?\nFile not found: %s" % libfile)
 
-        self.lib = ctypes.cdll.LoadLibrary(dirname+'/'+libfilename)
-
-        l = self.lib
+        l = ctypes.cdll.LoadLibrary(dirname+'/'+libfilename)
 
         l.Solver_new.restype = c_void_p
         l.Solver_new.argtypes = []
@@ -84,11 +101,17 @@ class Solver(object):
         l.addClause.argtypes = [c_void_p, c_int, c_void_p]
         l.addUnit.restype = c_bool
         l.addUnit.argtypes = [c_void_p, c_int]
+        l.addClauses.restype = c_bool
+        l.addClauses.argtypes = [c_void_p, c_int, c_void_p, c_void_p]
 
         l.solve.restype = c_bool
         l.solve.argtypes = [c_void_p]
         l.solve_assumptions.restype = c_bool
         l.solve_assumptions.argtypes = [c_void_p, c_int, c_void_p]
+        l.solve_limited.restype = c_int
+        l.solve_limited.argtypes = [c_void_p, c_int, c_void_p, c_int64, c_int64]
+        l.interrupt.argtypes = [c_void_p]
+        l.clearInterrupt.argtypes = [c_void_p]
         l.check_complete.restype = c_bool
         l.check_complete.argtypes = [c_void_p, c_int, c_void_p, c_bool]
         l.simplify.restype = c_bool
@@ -121,6 +144,7 @@ class Solver(object):
         l.get_propagations.restype = c_int64
         l.get_conflicts.argtypes = [c_void_p]
         l.get_conflicts.restype = c_int64
+        return l
 
     def __del__(self):  # type: () -> None
         """Delete the Solver object"""
@@ -137,6 +161,11 @@ class Solver(object):
         """Helper function to turn any iterable into an array (unless it already is one)"""
         if isinstance(seq, array.array):
             return seq
+        elif isinstance(seq, memoryview) and seq.format == 'i' and seq.contiguous:
+            # e.g. a mapped file: one bulk copy rather than one per item
+            a = array.array('i')
+            a.frombytes(seq.cast('B'))
+            return a
         else:
             return array.array('i', seq)
 
@@ -217,6 +246,49 @@ class Solver(object):
         else:
             return self.lib.addClause(self.s, 0, None)
 
+    def add_clauses(self, lits, offsets):  # type: (Sequence[int], Sequence[int]) -> bool
+        """Add many clauses to the solver with a single library call.
+
+        The clauses are given as one flat sequence of literals, specified as
+        in `add_clause()`, and the offsets at which each clause starts, plus
+        a final offset marking the end of the last one (so clause ``i`` is
+        ``lits[offsets[i]:offsets[i+1]]``).  ``array('i')`` arguments are
+        passed to the library without copying.
+
+        >>> S = MinisatSolver()
+        >>> for i in range(3):
+        ...     S.new_var()  # doctest: +ELLIPSIS
+        0
+        1
+        2
+        >>> S.add_clauses([1, 2, -1, 3, -3], [0, 2, 4, 5])
+        True
+        >>> S.solve()
+        True
+        >>> list(S.get_model())
+        [0, 1, 0]
+
+        Returns:
+            False if a conflict was detected (the remaining clauses are then
+            not added), True otherwise.
+        """
+        a, offs = self._check_flat(lits, offsets)
+        a_ptr, _ = self._to_intptr(a)
+        offs_ptr, _ = self._to_intptr(offs)
+        return self.lib.addClauses(self.s, len(offs) - 1, a_ptr, offs_ptr)
+
+    def _check_flat(self, lits, offsets):  # type: (Sequence[int], Sequence[int]) -> Tuple[array.array, array.array]
+        """Validate a flat constraint buffer once, in bulk, and return it as int arrays"""
+        a = self._get_array(lits)
+        offs = self._get_array(offsets)
+        if len(offs) == 0 or offs[0] != 0 or offs[-1] != len(a):
+            raise Exception("Offsets must start at 0 and end at the number of literals (%d)." % len(a))
+        if any(offs[i] > offs[i+1] for i in range(len(offs) - 1)):
+            raise Exception("Offsets must be non-decreasing.")
+        if len(a) > 0 and (max(a) > self.nvars() or -min(a) > self.nvars() or 0 in a):
+            raise Exception("Not all variables in the given literals are created yet.  Call new_var() first.")
+        return a, offs
+
     def check_complete(self, positive_lits=None, negative_lits=None):  # type: (Sequence[int], Sequence[int]) -> bool
         """Check whether a given complete assignment satisfies the current set
         of clauses.  For efficiency, it may be given just the positive literals
@@ -244,48 +316,180 @@ class Solver(object):
         else:
             raise Exception("Either positive_lits or negative_lits must be specified in check_complete().")
 
-    def solve(self, assumptions=None):  # type: (Sequence[int]) -> bool
-        """Solve the current set of clauses, optionally with a set of assumptions.
+    def solve(self, assumptions=None, conflict_budget=None, propagation_budget=None, time_budget=None):
+        # type: (Sequence[int], int, int, float) -> typing.Optional[bool]
+        """Solve the current set of clauses, optionally with a set of
+        assumptions and optionally within a budget.  A search stopped by its
+        budget keeps what it learned, so solving again continues from there.
 
         Args:
             assumptions:
               An optional sequence of literals as integers, specified as in
               `add_clause()`.
+            conflict_budget, propagation_budget (int):
+              Optional numbers of further conflicts and propagations after
+              which to stop the search.
+            time_budget (float):
+              Optional number of seconds after which to stop the search.
 
         Returns:
-            True if the clauses (and assumptions) are satisfiable, False otherwise.
+            True if the clauses (and assumptions) are satisfiable, False
+            otherwise, or None if the search ran out of budget or was stopped
+            by `interrupt()` first.
+
+        >>> S = MinisatSolver()
+        >>> for i in range(2):
+        ...     S.new_var()  # doctest: +ELLIPSIS
+        0
+        1
+        >>> S.add_clause([1, 2])
+        True
+        >>> S.solve([-1], conflict_budget=100)
+        True
+        >>> S.solve([-1, -2], conflict_budget=100, time_budget=1.0)
+        False
         """
-        if assumptions is None:
-            return self.lib.solve(self.s)
-        else:
-            a = self._get_array(assumptions)
+        return self._solve_limited(self._get_array(assumptions if assumptions is not None else []),
+                                   conflict_budget, propagation_budget, time_budget)
+
+    def _solve_limited(self, a, conflict_budget=None, propagation_budget=None, time_budget=None):
+        # type: (array.array, int, int, float) -> typing.Optional[bool]
+        """Helper function to solve under the assumptions in array a, stopping
+        when out of budget or interrupted"""
+        timer = None
+        expired = []
+        if time_budget is not None:
+            def expire():  # type: () -> None
+                expired.append(True)
+                self.lib.interrupt(self.s)
+            timer = threading.Timer(time_budget, expire)
+            timer.daemon = True
+            timer.start()
+        try:
             a_ptr, size = self._to_intptr(a)
-            return self.lib.solve_assumptions(self.s, size, a_ptr)
+            result = self.lib.solve_limited(self.s, size, a_ptr,
+                                            -1 if conflict_budget is None else conflict_budget,
+                                            -1 if propagation_budget is None else propagation_budget)
+        finally:
+            if timer is not None:
+                timer.cancel()
+                timer.join()
+                # clear the timer's interrupt, but not one from interrupt()
+                with self._interrupt_lock:
+                    if expired and not self._interrupted:
+                        self.lib.clearInterrupt(self.s)
+        return None if result < 0 else bool(result)
+
+    def solve_async(self, assumptions=None, conflict_budget=None, propagation_budget=None, time_budget=None):
+        # type: (Sequence[int], int, int, float) -> Future
+        """Solve the current set of clauses in a new thread, optionally with a
+        set of assumptions and a budget as for `solve()`.  The search runs
+        without the GIL, so solvers solving at once in different threads
+        search in parallel.  The solver must not be used otherwise until the
+        search has finished.
+
+        Args:
+            assumptions:
+              An optional sequence of literals as integers, specified as in
+              `add_clause()`.
+            conflict_budget, propagation_budget, time_budget:
+              Optional budgets, as for `solve()`.
+
+        Returns:
+            A `concurrent.futures.Future` of the result: True if the clauses
+            (and assumptions) are satisfiable, False if not, or None if the
+            search was stopped by `interrupt()` or ran out of budget.
+
+        >>> S = MinisatSolver()
+        >>> S.new_var()
+        0
+        >>> S.solve_async([-1]).result()
+        True
+        >>> S.interrupt()
+        >>> S.solve_async([-1]).result() is None
+        True
+        >>> S.clear_interrupt()
+        >>> S.solve_async([-1]).result()
+        True
+        """
+        a = self._get_array(assumptions if assumptions is not None else [])
+        future = Future()  # type: Future
+
+        def run():  # type: () -> None
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = self._solve_limited(a, conflict_budget, propagation_budget, time_budget)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        return future
+
+    def interrupt(self):  # type: () -> None
+        """Stop a search running in another thread (see `solve_async()`) as
+        soon as possible; it returns None.  Until `clear_interrupt()` is
+        called, further searches stop immediately too."""
+        with self._interrupt_lock:
+            self._interrupted = True
+            self.lib.interrupt(self.s)
+
+    def clear_interrupt(self):  # type: () -> None
+        """Clear the flag set by `interrupt()`, so the solver can search again."""
+        with self._interrupt_lock:
+            self._interrupted = False
+            self.lib.clearInterrupt(self.s)
 
     def simplify(self):  # type: () -> bool
         '''Call Solver.simplify().'''
         return self.lib.simplify(self.s)
 
-    def get_model(self, start=0, end=-1):  # type: (int, int) -> array.array
+    def get_model(self, start=0, end=-1, out=None):  # type: (int, int, object) -> object
         """Get the current model from the solver, optionally retrieving only a slice.
 
         Args:
             start, end (int):
               Optional start and end indices, interpreted as in ``range()``.
+            out:
+              An optional writable buffer of 32-bit ints (an ``array('i')``,
+              a NumPy ``int32`` array, ...) of at least ``end-start`` items
+              to fill instead of allocating a new array, so a loop over many
+              models can reuse one buffer.
 
         Returns:
             An array of booleans indexed to each variable (from 0).  If a start
             index was given, the returned list starts at that index (i.e.,
-            ``get_model(10)[0]`` is index 10 from the solver's model.
+            ``get_model(10)[0]`` is index 10 from the solver's model.  If
+            ``out`` was given, it is returned.
+
+        >>> S = MinisatSolver()
+        >>> for i in range(3):
+        ...     S.new_var()  # doctest: +ELLIPSIS
+        0
+        1
+        2
+        >>> S.add_clauses([1, -2, 3], [0, 1, 2, 3])
+        True
+        >>> S.solve()
+        True
+        >>> buf = array.array('i', bytes(4 * 3))
+        >>> S.get_model(out=buf) is buf
+        True
+        >>> list(buf)
+        [1, 0, 1]
         """
         if end == -1:
             end = self.nvars()
-        a = array.array('i', [-1] * (end-start))
-        a_ptr, size = self._to_intptr(a)
-        self.lib.fillModel(self.s, a_ptr, start, end)
-        return a
+        if out is None:
+            out = array.array('i', bytes(4 * (end-start)))
+        self.lib.fillModel(self.s, self._out_ptr(out, end-start), start, end)
+        return out
 
-    def get_model_trues(self, start=0, end=-1, offset=0):  # type: (int, int, int) -> array.array
+    def get_model_trues(self, start=0, end=-1, offset=0, out=None):  # type: (int, int, int, object) -> object
         """Get variables assigned true in the current model from the solver.
 
         Args:
@@ -294,19 +498,35 @@ class Solver(object):
             offset (int):
               Optional offset to be added to the zero-based variable numbers
               from MiniSat.
+            out:
+              An optional writable buffer of 32-bit ints, as for
+              `get_model()`, with room for ``end-start`` items.
 
         Returns:
             An array of true variables in the solver's current model.  If a
             start index was given, the variables are indexed from that value.
+            If ``out`` was given, the true variables are written to its start
+            and their number is returned instead.
             """
         if end == -1:
             end = self.nvars()
-        a = array.array('i', [-1] * (end-start))
-        a_ptr, size = self._to_intptr(a)
-        count = self.lib.getModelTrues(self.s, a_ptr, start, end, offset)
+        if out is not None:
+            return self.lib.getModelTrues(self.s, self._out_ptr(out, end-start), start, end, offset)
+        a = array.array('i', bytes(4 * (end-start)))
+        count = self.lib.getModelTrues(self.s, self._out_ptr(a, end-start), start, end, offset)
         # reduce the array down to just the valid indexes
         return a[:count]
 
+    @staticmethod
+    def _out_ptr(out, size):  # type: (object, int) -> object
+        """Helper function to get a ctypes pointer into a writable buffer of at least size 32-bit ints"""
+        view = memoryview(out)
+        if view.readonly or view.itemsize != ctypes.sizeof(c_int) or view.format.lstrip('@=<') not in ('i', 'l'):
+            raise Exception("Output buffer must be a writable buffer of 32-bit ints.")
+        if view.nbytes < size * view.itemsize:
+            raise Exception("Output buffer holds %d items, %d needed." % (view.nbytes // view.itemsize, size))
+        return (c_int * size).from_buffer(out) if size > 0 else None
+
     def block_model(self):
         """Block the current model from the solver."""
         model = self.get_model()
@@ -397,7 +617,8 @@ class SubsetMixin(Solver):
                 An optional sequence of extra literals to use when solving.
 
         Returns:
-            True if the given subset is satisfiable, False otherwise.
+            True if the given subset is satisfiable, False otherwise, or
+            None if the search was stopped by `interrupt()`.
         """
         if self._origvars is None:
             raise Exception("SubsetSolver.set_varcounts() must be called before .solve_subset()")
@@ -405,8 +626,7 @@ class SubsetMixin(Solver):
         assumptions = array.array('i', [i+self._origvars+1 for i in subset])
         if extra_assumps:
             assumptions.extend(extra_assumps)
-        a_ptr, size = self._to_intptr(assumptions)
-        return self.lib.solve_assumptions(self.s, size, a_ptr)
+        return self._solve_limited(assumptions)
 
     def unsat_core(self, offset=0):  # type: (int) -> array.array
         """Get an UNSAT core from the last check performed by
@@ -498,7 +718,8 @@ class MinicardSolver(Solver):
     >>> S = MinicardSolver()
 
     This has the same interface as `MinisatSolver`, with the addition of
-    the `add_atmost()` and `add_atleast()` methods.
+    the `add_atmost()`, `add_atmosts()`, `add_atleast()`, `add_lex_leq()`
+    and `enumerate()` methods.
 
     >>> for i in range(4):
     ...     S.new_var()  # doctest: +ELLIPSIS
@@ -540,16 +761,24 @@ class MinicardSolver(Solver):
     def __init__(self):  # type: () -> None
         super(MinicardSolver, self).__init__("libminicard.so")
 
-    def _setup_lib(self, libfilename):  # type: (str) -> None
+    @classmethod
+    def _setup_lib(cls, libfilename):  # type: (str) -> ctypes.CDLL
         """Correct return types (if not int as assumed by ctypes) and set argtypes for
            functions from the minicard library.
         """
-        super(MinicardSolver, self)._setup_lib(libfilename)
+        l = super(MinicardSolver, cls)._setup_lib(libfilename)
 
         # additional function for minicard
-        l = self.lib
         l.addAtMost.restype = c_bool
         l.addAtMost.argtypes = [c_void_p, c_int, c_void_p, c_int]
+        l.addAtMosts.restype = c_bool
+        l.addAtMosts.argtypes = [c_void_p, c_int, c_void_p, c_void_p, c_void_p]
+        l.addLexLeq.restype = c_bool
+        l.addLexLeq.argtypes = [c_void_p, c_int, c_void_p, c_void_p]
+        l.enumerateModels.restype = c_int
+        l.enumerateModels.argtypes = [c_void_p, c_int, c_void_p, c_int, c_void_p, c_int, c_void_p,
+                                      ctypes.POINTER(c_bool)]
+        return l
 
     def add_atmost(self, lits, k):  # type: (Sequence[int], int) -> bool
         """Add an AtMost constraint to the solver.
@@ -576,6 +805,157 @@ class MinicardSolver(Solver):
         else:
             return self.lib.addAtMost(self.s, 0, None, 0)
 
+    def add_atmosts(self, lits, offsets, ks):  # type: (Sequence[int], Sequence[int], Sequence[int]) -> bool
+        """Add many AtMost constraints to the solver with a single library call.
+
+        The literal sets are given as in `add_clauses()`, and ``ks[i]`` is the
+        bound of the ``i``-th set.
+
+        >>> S = MinicardSolver()
+        >>> for i in range(3):
+        ...     S.new_var()  # doctest: +ELLIPSIS
+        0
+        1
+        2
+        >>> S.add_atmosts([1, 2, 3, -1, -2], [0, 3, 5], [1, 1])
+        True
+        >>> S.solve([1])
+        True
+        >>> S.solve([-1, -2])
+        False
+
+        Returns:
+            False if a conflict was detected (the remaining constraints are
+            then not added), True otherwise.
+        """
+        a, offs = self._check_flat(lits, offsets)
+        bounds = self._get_array(ks)
+        if len(bounds) != len(offs) - 1:
+            raise Exception("Expected %d bounds, got %d." % (len(offs) - 1, len(bounds)))
+        if len(bounds) > 0 and min(bounds) < 0:
+            raise Exception("AtMost bounds must be non-negative.")
+        a_ptr, _ = self._to_intptr(a)
+        offs_ptr, _ = self._to_intptr(offs)
+        ks_ptr, _ = self._to_intptr(bounds)
+        return self.lib.addAtMosts(self.s, len(offs) - 1, a_ptr, offs_ptr, ks_ptr)
+
+    def add_lex_leq(self, vec1, vec2):  # type: (Sequence[int], Sequence[int]) -> bool
+        """Add a lexicographic ordering constraint vec1 <= vec2 to the solver.
+
+        The vectors are compared position by position from the first, with
+        False < True.  MiniCard propagates the constraint natively instead
+        of through a clausal decomposition.
+
+        >>> S = MinicardSolver()
+        >>> for i in range(4):
+        ...     S.new_var()  # doctest: +ELLIPSIS
+        0
+        1
+        2
+        3
+        >>> S.add_lex_leq([1, 2], [3, 4])
+        True
+        >>> S.add_clause([1])
+        True
+        >>> S.solve([-4])
+        True
+        >>> list(S.get_model())
+        [1, 0, 1, 0]
+        >>> S.solve([-3])
+        False
+
+        Args:
+            vec1, vec2:
+              Two sequences of literals of the same length, each integer
+              specifying a variable with **1**-based counting and a sign via
+              the sign of the integer.
+
+        Returns:
+            A boolean value returned from MiniCard's ``addLexLeq()``
+            function, indicating success (True) or conflict (False).
+        """
+        if len(vec1) != len(vec2):
+            raise Exception("Lex vectors %s and %s differ in length." % (vec1, vec2))
+        if not all(abs(x) <= self.nvars() for x in list(vec1) + list(vec2)):
+            raise Exception("Not all variables in %s, %s are created yet.  Call new_var() first." % (vec1, vec2))
+
+        a1 = self._get_array(vec1)
+        a2 = self._get_array(vec2)
+        a1_ptr, size = self._to_intptr(a1)
+        a2_ptr, _ = self._to_intptr(a2)
+        return self.lib.addLexLeq(self.s, size, a1_ptr, a2_ptr)
+
+    def enumerate(self, projection, limit=None, batch=1024, assumptions=None):
+        # type: (Sequence[int], int, int, Sequence[int]) -> Iterable[bytes]
+        """Enumerate the models of the current constraints (under optional
+        assumptions) inside MiniCard, blocking each model on the projection
+        variables, so that no two models agree on all of them.  The blocking
+        clauses stay in the solver.
+
+        Models are returned in batches of packed bits: model i of a batch
+        occupies bytes ``i*stride`` to ``(i+1)*stride``, with
+        ``stride = (len(projection)+7)//8``, and the value of
+        ``projection[j]`` is bit ``j%8`` of byte ``j//8`` of it.  See
+        `unpack_models()`.
+
+        >>> S = MinicardSolver()
+        >>> for i in range(3):
+        ...     S.new_var()  # doctest: +ELLIPSIS
+        0
+        1
+        2
+        >>> S.add_clause([1, 2])
+        True
+        >>> batches = list(S.enumerate([1, 2], batch=2))
+        >>> [len(b) for b in batches]
+        [2, 1]
+        >>> sorted(m for b in batches for m in MinicardSolver.unpack_models(b, 2))
+        [[False, True], [True, False], [True, True]]
+
+        Args:
+            projection:
+              A sequence of variables (**1**-based) to block models on.
+            limit (int):
+              An optional bound on the total number of models.
+            batch (int):
+              The largest number of models in one batch.
+            assumptions:
+              An optional sequence of literals, as in `solve()`, that every
+              model must satisfy.
+
+        Returns:
+            An iterator over the batches, as ``bytes``.  It ends early,
+            without every model, if the search is stopped by `interrupt()`.
+        """
+        if not all(0 < x <= self.nvars() for x in projection):
+            raise Exception("Not all variables in %s are created yet.  Call new_var() first." % projection)
+        a = self._get_array(projection)
+        a_ptr, size = self._to_intptr(a)
+        assumps = self._get_array(assumptions if assumptions is not None else [])
+        assumps_ptr, assumps_size = self._to_intptr(assumps)
+        stride = (size + 7) // 8
+        buf = ctypes.create_string_buffer(max(1, batch * stride))
+        exhausted = c_bool(False)
+        while not exhausted.value and (limit is None or limit > 0):
+            want = batch if limit is None else min(batch, limit)
+            count = self.lib.enumerateModels(self.s, size, a_ptr, assumps_size, assumps_ptr, want, buf,
+                                             ctypes.byref(exhausted))
+            if count > 0:
+                yield buf.raw[:count * stride]
+            if count < want and not exhausted.value:
+                return  # stopped by interrupt()
+            if limit is not None:
+                limit -= count
+
+    @staticmethod
+    def unpack_models(models, width):  # type: (bytes, int) -> Iterable[list]
+        """Iterate over the models of an `enumerate()` batch as lists of
+        ``width`` booleans, one per projection variable."""
+        stride = (width + 7) // 8
+        for i in range(0, len(models), stride):
+            model = models[i:i+stride]
+            yield [bool(model[j >> 3] >> (j & 7) & 1) for j in range(width)]
+
     def add_atleast(self, lits, k):  # type: (Sequence[int], int) -> bool
         """Convenience function to add an AtLeast constraint.
         Translates the AtLeast into an equivalent AtMost.
@@ -736,3 +1116,84 @@ class MinicardSubsetSolver(SubsetMixin, MinicardSolver):
         new_k = len(lits) - k
         new_lits = [-x for x in lits]
         return self.add_atmost_instrumented(new_lits, new_k, index)
+
+
+class SolverPool(object):
+    """Hands out new solvers of one class, constructed ahead of time in batches.
+
+    A solver keeps the clauses added to it, so solvers are not returned to
+    the pool: each `get()` gives a fresh solver, optionally with its
+    variables already created.
+
+    >>> pool = SolverPool(MinicardSolver, size=4)
+    >>> S = pool.get(3)
+    >>> S.nvars()
+    3
+    >>> S.add_clause([1, -2, 3])
+    True
+    >>> pool.get().nvars()
+    0
+    """
+
+    def __init__(self, solver_class=MinicardSolver, size=64):  # type: (type, int) -> None
+        self.solver_class = solver_class
+        self.size = size
+        self._solvers = []  # type: typing.List[Solver]
+
+    def fill(self):  # type: () -> None
+        """Construct solvers until the pool holds `size` of them, e.g. while otherwise idle."""
+        while len(self._solvers) < self.size:
+            self._solvers.append(self.solver_class())
+
+    def get(self, nvars=0):  # type: (int) -> Solver
+        """Take a new solver from the pool, refilling it if empty.
+
+        Args:
+            nvars (int):
+              The number of variables to create in the solver, with the
+              default polarity.
+        """
+        if not self._solvers:
+            self.fill()
+        solver = self._solvers.pop()
+        while solver.nvars() < nvars:
+            solver.new_var()
+        return solver
+
+
+def race(solvers, assumptions=None):  # type: (Sequence[Solver], Sequence[int]) -> Tuple[int, bool]
+    """Solve with all of the solvers at once, each in its own thread, and stop
+    the others once the first finishes.  The solvers are interchangeable
+    contestants, e.g. encodings of the same problem or differently seeded
+    copies.  They keep what they learned while searching, so the losers can
+    race again.
+
+    Args:
+        solvers:
+          The solvers to race; none may be searching already.
+        assumptions:
+          An optional sequence of literals as integers, given to every solver.
+
+    Returns:
+        The index of the first solver to finish and its result, as from
+        `Solver.solve()`.
+
+    >>> solvers = [MinicardSolver() for i in range(3)]
+    >>> for S in solvers:
+    ...     _ = S.new_var()
+    ...     _ = S.add_clause([1])
+    >>> index, result = race(solvers, [-1])
+    >>> result
+    False
+    >>> race(solvers)[1]
+    True
+    """
+    futures = [solver.solve_async(assumptions) for solver in solvers]
+    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+    winner = min(futures.index(future) for future in done)
+    for solver in solvers:
+        solver.interrupt()
+    wait(futures)
+    for solver in solvers:
+        solver.clear_interrupt()
+    return winner, futures[winner].result()
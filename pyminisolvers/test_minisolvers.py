@@ -50,11 +50,55 @@ class MinisatTest(unittest.TestCase):
         for cl in subset:
             self.assertTrue(any([ m[abs(x)-1] == isPositive(x) for x in cl ]))
 
+    def test_model_into_buffer(self):
+        import array
+        self.add_subset(self.clauses[:-1])
+        self.solver.solve()
+        m = self.solver.get_model()
+        buf = array.array('i', [7] * (self.numvars + 1))
+        self.assertIs(self.solver.get_model(out=buf), buf)
+        self.assertEqual(list(buf[:-1]), list(m))
+        self.assertEqual(buf[-1], 7)
+        self.assertIs(self.solver.get_model(2, 5, out=buf), buf)
+        self.assertEqual(list(buf[:3]), list(m[2:5]))
+        count = self.solver.get_model_trues(1, 6, 1, out=buf)
+        self.assertEqual(list(buf[:count]), list(self.solver.get_model_trues(1, 6, 1)))
+
+    def test_model_buffer_checks(self):
+        import array
+        self.add_subset(self.clauses[:-1])
+        self.solver.solve()
+        self.assertRaises(Exception, self.solver.get_model, out=array.array('i', [0] * (self.numvars - 1)))
+        self.assertRaises(Exception, self.solver.get_model, out=array.array('d', [0] * self.numvars))
+        self.assertRaises(Exception, self.solver.get_model, out=bytes(4 * self.numvars))
+
     def test_implies(self):
         self.add_subset(self.clauses[:-1])
         implications = self.solver.implies()
         self.assertEqual(set(implications), set([1,-2]))
 
+    def test_add_clauses(self):
+        import array
+        for i in range(self.numvars):
+            self.solver.new_var()
+        lits = array.array('i', [x for cl in self.clauses[:-1] for x in cl])
+        offsets = array.array('i', [0])
+        for cl in self.clauses[:-1]:
+            offsets.append(offsets[-1] + len(cl))
+        self.assertEqual(self.solver.add_clauses(lits, offsets), True)
+        self.assertEqual(self.solver.solve(), True)
+        self.assertEqual(self.solver.add_clauses([-6], [0, 1]), False)
+        self.assertEqual(self.solver.solve(), False)
+
+    def test_add_clauses_checks(self):
+        for i in range(self.numvars):
+            self.solver.new_var()
+        self.assertRaises(Exception, self.solver.add_clauses, [1, 7], [0, 2])
+        self.assertRaises(Exception, self.solver.add_clauses, [1, 0], [0, 2])
+        self.assertRaises(Exception, self.solver.add_clauses, [1, 2], [0, 1])
+        self.assertRaises(Exception, self.solver.add_clauses, [1, 2, 3], [0, 3000000, 3])
+        self.assertRaises(Exception, self.solver.add_clauses, [1, 2, 3], [0, 2, 1, 3])
+
     def test_implies_assumptions(self):
         self.add_subset(self.clauses[:-1])
         implications = self.solver.implies([5])
@@ -159,6 +203,21 @@ class MinicardTest(unittest.TestCase):
             self.solver.solve(assumps)
             self.assertEqual(self.solver.solve(self.assumptions), True)
 
+    def test_add_atmosts(self):
+        self.make_vars()
+        atmosts = [([1, 2, 3, 4], 2), ([3, 4, 5], 1), ([5, 6], 0)]
+        lits = [x for lits, k in atmosts for x in lits]
+        offsets = [0, 4, 7, 9]
+        self.assertEqual(self.solver.add_atmosts(lits, offsets, [k for lits, k in atmosts]), True)
+        self.assertEqual(self.solver.solve([1, 2]), True)
+        m = self.solver.get_model()
+        self.assertEqual([m[2], m[3], m[4], m[5]], [0, 0, 0, 0])
+        self.assertEqual(self.solver.solve([3, 4]), False)
+        self.assertEqual(self.solver.solve([1, 3]), True)
+        self.assertRaises(Exception, self.solver.add_atmosts, lits, offsets, [1, 1])
+        self.assertRaises(Exception, self.solver.add_atmosts, lits, offsets, [2, -1, 0])
+        self.assertRaises(Exception, self.solver.add_atmosts, lits, [0, 7, 4, 9], [2, 1, 0])
+
     def test_complete(self):
         self.make_vars()
         self.add_atmosts(self.atmosts)
@@ -167,6 +226,72 @@ class MinicardTest(unittest.TestCase):
         self.int_check()
         self.assertEqual(self.solver.solve(self.assumptions), True)
 
+    def test_lex_leq(self):
+        import itertools
+        import random
+        random.seed(1)
+        n = 4
+        vecs = [list(range(1+n*i, 1+n*(i+1))) for i in range(3)]
+        for i in range(3*n):
+            self.solver.new_var()
+        clauses = [[random.choice([1, -1]) * random.randint(1, 3*n) for _ in range(3)] for _ in range(6)]
+        for cl in clauses:
+            self.solver.add_clause(cl)
+        # vec0 <= vec1 and vec1 <= reversed negation of vec2
+        pairs = [(vecs[0], vecs[1]), (vecs[1], [-x for x in reversed(vecs[2])])]
+        for vec1, vec2 in pairs:
+            self.assertEqual(self.solver.add_lex_leq(vec1, vec2), True)
+
+        def value(m, lit):
+            return m[abs(lit)-1] == (lit > 0)
+
+        expected = 0
+        for m in itertools.product([False, True], repeat=3*n):
+            if all(any(value(m, x) for x in cl) for cl in clauses) and \
+               all([value(m, x) for x in vec1] <= [value(m, x) for x in vec2] for vec1, vec2 in pairs):
+                expected += 1
+
+        found = 0
+        while self.solver.solve():
+            found += 1
+            self.solver.block_model()
+        self.assertEqual(found, expected)
+
+    def test_enumerate(self):
+        import itertools
+        for i in range(10):
+            self.solver.new_var()
+        self.solver.add_atmost(list(range(1, 11)), 3)
+        self.solver.add_clause([1, 2, 9])
+        # models of the first 9 variables, with x10 projected away
+        expected = set(m for m in itertools.product([False, True], repeat=9)
+                       if sum(m) <= 3 and (m[0] or m[1] or m[8]))
+        batches = list(self.solver.enumerate(list(range(1, 10)), batch=50))
+        self.assertTrue(all(len(b) <= 50*2 for b in batches))
+        found = [tuple(m) for b in batches for m in self.solver.unpack_models(b, 9)]
+        self.assertEqual(len(found), len(expected))
+        self.assertEqual(set(found), expected)
+        self.assertEqual(self.solver.solve(), False)
+
+    def test_enumerate_limit(self):
+        self.make_vars()
+        models = b"".join(self.solver.enumerate([3, 1, 2], limit=5, batch=2))
+        self.assertEqual(len(models), 5)
+        self.assertEqual(len(set(models)), 5)
+        self.assertEqual(len(b"".join(self.solver.enumerate([3, 1, 2]))), 3)
+
+    def test_enumerate_assumptions(self):
+        self.make_vars()
+        models = b"".join(self.solver.enumerate([1, 2, 3], assumptions=[-2, 4]))
+        self.assertEqual(sorted(models), [0, 1, 4, 5])
+        # the other half of the projection space is still there
+        self.assertEqual(len(b"".join(self.solver.enumerate([1, 2, 3]))), 4)
+
+    def test_lex_leq_conflict(self):
+        self.make_vars()
+        self.add_subset([[1], [-3]])
+        self.assertEqual(self.solver.add_lex_leq([1, 2], [3, 4]), False)
+
 
 class MinicardSubsetTest(unittest.TestCase):
     def setUp(self):
@@ -209,5 +334,134 @@ class MinicardSubsetTest(unittest.TestCase):
         self.assertEqual(sorted(core3), [2, 3])
 
 
+
+class SolverPoolTest(unittest.TestCase):
+    def test_shared_lib(self):
+        self.assertIs(minisolvers.MinicardSolver().lib, minisolvers.MinicardSubsetSolver().lib)
+        self.assertIsNot(minisolvers.MinicardSolver().lib, minisolvers.MinisatSolver().lib)
+        # the minicard prototypes are not lost to the plain solver setup
+        solver = minisolvers.MinicardSolver()
+        for i in range(3):
+            solver.new_var()
+        self.assertEqual(solver.add_atmost([1, 2, 3], 1), True)
+
+    def test_pool(self):
+        pool = minisolvers.SolverPool(minisolvers.MinisatSolver, size=2)
+        solvers = [pool.get(4) for i in range(5)]
+        self.assertEqual(len(set(id(solver) for solver in solvers)), 5)
+        self.assertTrue(all(isinstance(solver, minisolvers.MinisatSolver) for solver in solvers))
+        self.assertEqual([solver.nvars() for solver in solvers], [4] * 5)
+        solvers[0].add_clause([-1])
+        self.assertEqual(solvers[1].solve([1]), True)
+
+
+def pigeonhole(solver, holes):
+    """ clauses putting holes+1 pigeons into the given number of holes, one per
+        hole; unsatisfiable, and hard for the solvers beyond a few holes
+    """
+    var = lambda p, h: p*holes + h + 1
+    for i in range((holes+1) * holes):
+        solver.new_var()
+    for p in range(holes+1):
+        solver.add_clause([var(p, h) for h in range(holes)])
+    for h in range(holes):
+        for p in range(holes+1):
+            for q in range(p):
+                solver.add_clause([-var(p, h), -var(q, h)])
+
+
+class InterruptTest(unittest.TestCase):
+    def test_interrupt(self):
+        import time
+        for solver_class in minisolvers.MinisatSolver, minisolvers.MinicardSolver:
+            solver = solver_class()
+            pigeonhole(solver, 12)
+            future = solver.solve_async()
+            time.sleep(0.2)
+            self.assertFalse(future.done())
+            solver.interrupt()
+            self.assertIsNone(future.result(timeout=10))
+            solver.clear_interrupt()
+            # pigeons 0 and 1 both in hole 0
+            self.assertEqual(solver.solve_async([1, 13]).result(timeout=10), False)
+
+    def test_interrupted_solve_is_unknown(self):
+        solver = minisolvers.MinicardSolver()
+        pigeonhole(solver, 3)
+        solver.interrupt()
+        self.assertIsNone(solver.solve())
+        self.assertIsNone(solver.solve([1]))
+        self.assertEqual(list(solver.enumerate([1, 2])), [])
+        solver.clear_interrupt()
+        self.assertEqual(solver.solve(), False)
+
+        subset = minisolvers.MinisatSubsetSolver()
+        subset.set_varcounts(vars=1, constraints=1)
+        for i in range(2):
+            subset.new_var()
+        subset.add_clause_instrumented([1], 0)
+        subset.interrupt()
+        self.assertIsNone(subset.solve_subset([0]))
+
+    def test_interrupt_during_time_budget(self):
+        import time
+        solver = minisolvers.MinicardSolver()
+        pigeonhole(solver, 12)
+        future = solver.solve_async(time_budget=0.5)
+        time.sleep(0.1)
+        solver.interrupt()
+        self.assertIsNone(future.result(timeout=10))
+        # the interrupt outlives the budgeted call that it stopped
+        time.sleep(0.5)
+        self.assertIsNone(solver.solve([1, 13], time_budget=1.0))
+        solver.clear_interrupt()
+        self.assertEqual(solver.solve([1, 13], time_budget=1.0), False)
+
+    def test_race(self):
+        import time
+        hard = minisolvers.MinicardSolver()
+        pigeonhole(hard, 12)
+        easy = minisolvers.MinicardSolver()
+        pigeonhole(easy, 3)
+        start = time.time()
+        self.assertEqual(minisolvers.race([hard, easy]), (1, False))
+        self.assertLess(time.time() - start, 10)
+        # the interrupted loser can search again
+        self.assertEqual(hard.solve([1, 13]), False)
+
+
+
+class BudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.solver = minisolvers.MinicardSolver()
+        pigeonhole(self.solver, 12)
+
+    def test_conflict_budget(self):
+        # the budget is checked between decisions, so a few more conflicts may be spent
+        self.assertIsNone(self.solver.solve(conflict_budget=500))
+        conflicts = self.solver.get_stats()["conflicts"]
+        self.assertTrue(500 <= conflicts < 600)
+        self.assertIsNone(self.solver.solve(conflict_budget=500))
+        self.assertTrue(conflicts + 500 <= self.solver.get_stats()["conflicts"] < conflicts + 600)
+        # easy questions are still answered
+        self.assertEqual(self.solver.solve([1, 13], conflict_budget=500), False)
+
+    def test_propagation_budget(self):
+        self.assertIsNone(self.solver.solve(propagation_budget=10000))
+        self.assertGreaterEqual(self.solver.get_stats()["propagations"], 10000)
+
+    def test_time_budget(self):
+        import time
+        start = time.time()
+        self.assertIsNone(self.solver.solve(time_budget=0.2))
+        self.assertLess(time.time() - start, 5)
+        # the timer's interrupt does not outlive the call
+        conflicts = self.solver.get_stats()["conflicts"]
+        self.assertIsNone(self.solver.solve(conflict_budget=10))
+        self.assertGreaterEqual(self.solver.get_stats()["conflicts"], conflicts + 10)
+
+    def test_async_budget(self):
+        self.assertIsNone(self.solver.solve_async(conflict_budget=100).result(timeout=10))
+
 if __name__ == '__main__':
     unittest.main()
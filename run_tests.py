@@ -1,12 +1,22 @@
 import sys
 import lexleader
+import formula
+import cnfpool
+import lexcache
+import sweep
+import subprocess
+import time
+import tempfile
 import os
 import unittest
-from subprocess import Popen, PIPE
 from pyminisolvers import minisolvers
 from random import randint
 
-test_set = ["and", "and-cse", "or", "or-cse", "ror", "alpha", "alpha-m", "harvey"]
+# the check_lex helpers below each need a fresh solver
+solver_pool = minisolvers.SolverPool(minisolvers.MinicardSolver)
+
+test_set = ["and", "and-cse", "and-prefix", "or", "or-cse", "or-prefix", "ror", "alpha", "alpha-m", "harvey",
+            "and-cse-pg", "or-cse-pg", "ror-pg", "alpha-m-pg", "harvey-pg"]
 
 
 class TestLexLeader(unittest.TestCase):
@@ -76,14 +86,231 @@ class TestLexLeader(unittest.TestCase):
             self.assertFalse(self.check_lex(num_c, num_r, each, total_reverse))
             self.assertFalse(self.check_lex(num_c, num_r, each, partial_reverse))
 
+    def test_clauses_match_formula(self):
+        for each in test_set:
+            for num_c, num_r in [(2, 2), (2, 3), (3, 2)]:
+                models = list(self.all_models(num_c, num_r))
+                for model, expected in zip(models, self.check_lex_bool2cnf(num_c, num_r, each, models)):
+                    self.assertEqual(self.check_lex(num_c, num_r, each, model, "tseitin"), expected)
+                    self.assertEqual(self.check_lex(num_c, num_r, each, model, "pg"), expected)
+                    self.assertEqual(self.check_lex_clauses(num_c, num_r, each, model), expected)
+                    self.assertEqual(self.check_lex_clauses(num_c, num_r, each, model, "tseitin"), expected)
+                    self.assertEqual(self.check_lex_clauses(num_c, num_r, each, model, "pg"), expected)
+
+    def test_native_matches_clauses(self):
+        for num_c, num_r in [(2, 2), (2, 3), (3, 2), (3, 3)]:
+            for model in self.all_models(num_c, num_r):
+                self.assertEqual(self.check_lex_native(num_c, num_r, model),
+                                 self.check_lex_clauses(num_c, num_r, "harvey", model))
+
+    def test_lazy_matches_eager(self):
+        for each in ["and", "harvey"]:
+            for mode in ["clauses", "pg"]:
+                eager = lexleader.LexLeader(3, 3, each)
+                solver = minisolvers.MinicardSolver()
+                clauses = eager.make_lexleader_clauses() if mode == "clauses" else eager.make_lexleader_tseitin(pg=True)
+                while solver.nvars() < eager.num_var:
+                    solver.new_var()
+                for clause in clauses:
+                    solver.add_clause(clause)
+                expected = self.enumerate_matrix(solver, eager)
+
+                lazy = lexleader.LexLeader(3, 3, each)
+                solver = minisolvers.MinicardSolver()
+                while solver.nvars() < lazy.num_var:
+                    solver.new_var()
+                self.assertEqual(self.enumerate_matrix(solver, lazy, lazy=mode), expected)
+
+    def enumerate_matrix(self, solver, lex, lazy=None):
+        """ the set of matrix assignments of all models, adding violated
+            lex-leader constraints on demand if lazy names a conversion
+        """
+        matrix = range(1, lex.num_columns*lex.num_rows+1)
+        found = set()
+        while solver.solve():
+            model = list(solver.get_model())
+            violated = lex.violated_pairs(model) if lazy else []
+            if violated:
+                lex.num_var = solver.nvars()
+                for vector1, vector2, option in violated:
+                    clauses = lex.make_pair_clauses(vector1, vector2, lazy, option)
+                    while solver.nvars() < lex.num_var:
+                        solver.new_var()
+                    for clause in clauses:
+                        solver.add_clause(clause)
+                continue
+            found.add(tuple(model[v-1] for v in matrix))
+            solver.add_clause([-v if model[v-1] else v for v in matrix])
+        return found
+
+    def test_batch_matches_pairs(self):
+        for each in test_set:
+            for cnf in ["clauses", "tseitin", "pg"]:
+                for num_c, num_r in [(2, 2), (5, 3), (3, 7)]:
+                    batch = lexleader.LexLeader(num_c, num_r, each)
+                    pairs = lexleader.LexLeader(num_c, num_r, each)
+                    expected = [list(clause) for vector1, vector2 in pairs.vector_pairs()
+                                for clause in pairs.make_pair_clauses(vector1, vector2, cnf)]
+                    self.assertEqual([list(clause) for clause in batch.make_lexleader_batch(cnf)], expected)
+                    self.assertEqual(batch.num_var, pairs.num_var)
+
+    def test_hybrid_policy(self):
+        lex = lexleader.LexLeader(4, 3, "ror:3:alpha-m-pg:4:and", row_option="harvey")
+        self.assertEqual([option for _, _, option in lex.encoded_pairs()],
+                         ["alpha-m-pg"] * 3 + ["harvey"] * 2)
+        self.assertEqual([lex.encoding_for(n) for n in (1, 2, 3, 4, 100)],
+                         ["ror", "ror", "alpha-m-pg", "and", "and"])
+        for spec in ["ror:3", "ror:3:and:2:or", "ror:x:and"]:
+            self.assertRaises(ValueError, lexleader.parse_policy, spec)
+        self.assertRaises(ValueError, lexleader.LexLeader, 2, 2, "unknown")
+
+        # mixing encodings must not change the set of lex-leaders
+        for option, row_option in [("ror:3:or-cse", "alpha"), ("harvey-pg", "and-cse:4:alpha-m")]:
+            for num_c, num_r in [(3, 3), (4, 2)]:
+                expected = None
+                for args in [(option, row_option), ("harvey", None)]:
+                    lex = lexleader.LexLeader(num_c, num_r, args[0], row_option=args[1])
+                    clauses = lex.make_lexleader_clauses()
+                    solver = minisolvers.MinicardSolver()
+                    while solver.nvars() < lex.num_var:
+                        solver.new_var()
+                    for clause in clauses:
+                        solver.add_clause(clause)
+                    found = self.enumerate_matrix(solver, lex)
+                    expected = found if expected is None else expected
+                    self.assertEqual(found, expected)
+
+    def test_encoder_registry(self):
+        self.assertEqual(set(test_set) | {"native"}, set(lexleader.ENCODERS))
+        for each in test_set:
+            encoder = lexleader.ENCODERS[each]
+            for n in range(2, 7):
+                lex = lexleader.LexLeader(2, n, each, rows_enabled=False)
+                clauses = lex.make_lexleader_clauses()
+                self.assertEqual((lex.num_var - 2*n, len(clauses)), (encoder.aux_vars(n), encoder.num_clauses(n)), each)
+        self.assertEqual(lexleader.cheapest_encoders([5, 5], 2), ["native", "and-cse-pg"])
+
+        # a plugged-in encoder is usable like the built-in ones
+        def leq_first(lex, vector1, vector2):
+            return [lex._leq(lex.formula.var(vector1[0]), lex.formula.var(vector2[0]))]
+
+        def leq_first_clauses(lex, vector1, vector2):
+            lex.clauses.add(-vector1[0], vector2[0])
+        lexleader.register_encoder("first", lexleader.Encoder(leq_first, leq_first_clauses, lambda n: 0, lambda n: 1))
+        try:
+            lex = lexleader.LexLeader(3, 2, "first", rows_enabled=False)
+            self.assertEqual([list(clause) for clause in lex.make_lexleader_clauses()], [[-5, 3], [-3, 1]])
+        finally:
+            del lexleader.ENCODERS["first"]
+        self.assertRaises(ValueError, lexleader.LexLeader, 2, 2, "first")
+
+        # native is posted for the whole matrix, so it does not mix
+        self.assertRaises(ValueError, lexleader.LexLeader, 3, 3, "ror:2:native")
+        self.assertRaises(ValueError, lexleader.LexLeader, 3, 3, "harvey", row_option="native")
+        self.assertRaises(ValueError, lexleader.LexLeader, 3, 3, "native", row_option="harvey")
+        native = lexleader.LexLeader(3, 3, "native")
+        self.assertRaises(ValueError, native.make_lexleader_clauses)
+        self.assertRaises(ValueError, native.make_pair_clauses, native.column(1), native.column(0))
+        self.assertRaises(ValueError, lexleader.LexLeader(3, 3, "harvey").post_lexleader, minisolvers.MinicardSolver())
+
+    def test_window_and_first_k(self):
+        import itertools
+        lex = lexleader.LexLeader(4, 3, "and", rows_enabled=False, window=2)
+        self.assertEqual([(v1[0], v2[0]) for v1, v2 in lex.vector_pairs()],
+                         [(10, 7), (10, 4), (7, 4), (7, 1), (4, 1)])
+        lex = lexleader.LexLeader(4, 3, "and", window=None, first_k=2)
+        self.assertEqual(len(list(lex.vector_pairs())), 6 + 3)
+        self.assertTrue(all(len(v1) == 2 for v1, _ in lex.vector_pairs()))
+        self.assertRaises(ValueError, lexleader.LexLeader, 4, 3, "and", first_k=0)
+        self.assertRaises(ValueError, lexleader.LexLeader, 4, 3, "and", window=0)
+
+        def solutions(lex):
+            clauses = lex.make_lexleader_clauses()
+            solver = minisolvers.MinicardSolver()
+            while solver.nvars() < lex.num_var:
+                solver.new_var()
+            for clause in clauses:
+                solver.add_clause(clause)
+            return self.enumerate_matrix(solver, lex)
+
+        for each in ["and-cse", "ror-pg", "harvey"]:
+            for num_c, num_r in [(3, 3), (4, 3)]:
+                # more pairs only strengthen propagation, the lex-leaders stay the same
+                expected = solutions(lexleader.LexLeader(num_c, num_r, each))
+                for window in [2, None]:
+                    self.assertEqual(solutions(lexleader.LexLeader(num_c, num_r, each, window=window)), expected)
+
+                # truncated comparisons keep exactly the matrices whose prefixes are ordered
+                for window in [1, None]:
+                    lex = lexleader.LexLeader(num_c, num_r, each, window=window, first_k=2)
+                    truncated = set()
+                    for m in itertools.product([False, True], repeat=num_c*num_r):
+                        if all([m[v-1] for v in v1] <= [m[v-1] for v in v2] for v1, v2 in lex.vector_pairs()):
+                            truncated.add(m)
+                    self.assertEqual(solutions(lex), truncated)
+                    self.assertTrue(expected <= truncated)
+
+    def test_formula_sharing(self):
+        lex = lexleader.LexLeader(2, 10, "and", rows_enabled=False)
+        roots = lex.make_lexleader_formula()
+        equalities = [node for node in lex.formula.postorder(roots)
+                      if lex.formula.ops[node] == formula.EQUIV]
+        # one (A[j] = B[j]) node per position, however many prefixes use it
+        self.assertEqual(len(equalities), 9)
+
+    def test_prefix_sharing_is_linear(self):
+        for each in ["and-prefix", "or-prefix"]:
+            lex = lexleader.LexLeader(2, 100, each, rows_enabled=False)
+            roots = lex.make_lexleader_formula()
+            self.assertLess(len(list(lex.formula.postorder(roots))), 10*100)
+            self.assertLess(len(lex.make_lexleader_tseitin().lits), 50*100)
+
+    def test_estimate_size(self):
+        for each in test_set:
+            for cnf in ["clauses", "tseitin", "pg"]:
+                for num_c, num_r in [(5, 4), (3, 7), (2, 2)]:
+                    estimate = lexleader.LexLeader(num_c, num_r, each).estimate_size(cnf)
+                    lex = lexleader.LexLeader(num_c, num_r, each)
+                    if cnf == "clauses":
+                        clauses = lex.make_lexleader_clauses()
+                    else:
+                        clauses = lex.make_lexleader_tseitin(pg=(cnf == "pg"))
+                    self.assertEqual(estimate["aux_vars"], lex.num_var - num_c*num_r)
+                    self.assertEqual(estimate["clauses"], len(clauses))
+                    self.assertEqual(estimate["literals"], len(clauses.lits))
+            for num_c, num_r in [(5, 4), (3, 7), (2, 2)]:
+                estimate = lexleader.LexLeader(num_c, num_r, each).estimate_size("bool2cnf")
+                cnf = self.get_cnf(lexleader.LexLeader(num_c, num_r, each).make_lexleader())
+                nvars, nclauses = [int(x) for x in next(l for l in cnf if l.startswith('p')).split()[2:]]
+                self.assertEqual(estimate["aux_vars"], nvars - num_c*num_r)
+                self.assertEqual(estimate["clauses"], nclauses)
+                self.assertEqual(estimate["literals"], sum(len(l.split()) - 1 for l in cnf if l[:1] not in "cp"))
+        estimate = lexleader.LexLeader(5, 4, "native").estimate_size()
+        self.assertEqual((estimate["aux_vars"], estimate["clauses"], estimate["peak_bytes"]), (0, 0, 0))
+
+    def test_streaming_matches_full(self):
+        for each in test_set:
+            full = lexleader.LexLeader(4, 3, each).make_lexleader()
+            streamed = "\n& ".join(lexleader.LexLeader(4, 3, each).iter_lexleader())
+            self.assertEqual(streamed, full)
+
+            full = lexleader.LexLeader(4, 3, each).make_lexleader_clauses()
+            streamed = [list(clause) for buf in lexleader.LexLeader(4, 3, each).iter_lexleader_clauses()
+                        for clause in buf]
+            self.assertEqual(streamed, [list(clause) for clause in full])
+
+    def all_models(self, num_c, num_r):
+        for bits in range(1 << (num_c*num_r)):
+            yield [[(bits >> (c*num_r + r)) & 1 for r in range(num_r)] for c in range(num_c)]
+
     def make_assumps(self, complete, num_c, num_r, lex):
             assumps = ""
             for i in range(num_c):
                 for j in range(num_r):
                     if complete[i][j] is 1:
-                        assump = lex.varmap[(i, j)]
+                        assump = lex.var(i, j)
                     else:
-                        assump = -lex.varmap[(i, j)]
+                        assump = -lex.var(i, j)
                     assumps += lex.add_assumps(assump)
             return assumps
 
@@ -103,24 +330,65 @@ class TestLexLeader(unittest.TestCase):
             full.append(tuple(vertor))
         return sorted(full, key=lambda vector: self.get_lex_value(vector))
 
-    def check_lex(self, num_c, num_r, option, assignment):
+    def check_lex(self, num_c, num_r, option, assignment, converter="tseitin"):
         lex = lexleader.LexLeader(num_c, num_r, option, rows_enabled=False)
         lex_constraints = lex.make_lexleader()
         assumps = self.make_assumps(assignment, num_c, num_r, lex)
-        cnf = self.get_cnf(lex_constraints+assumps)
-        solver = minisolvers.MinicardSolver()
-        self.parse_dimacs(cnf, solver)
+        if converter == "bool2cnf":
+            solver = solver_pool.get()
+            cnf = self.get_cnf(lex_constraints+assumps)
+            self.parse_dimacs(cnf, solver)
+        else:
+            f = formula.Formula()
+            roots = f.parse(lex_constraints+assumps)
+            clauses, nvars = f.tseitin(roots, f.max_var(), pg=(converter == "pg"))
+            solver = solver_pool.get(nvars)
+            for clause in clauses:
+                solver.add_clause(clause)
         return solver.solve()
 
+    def check_lex_bool2cnf(self, num_c, num_r, option, assignments):
+        """ check_lex() for many assignments with one batched bool2cnf conversion """
+        formulas = []
+        for assignment in assignments:
+            lex = lexleader.LexLeader(num_c, num_r, option, rows_enabled=False)
+            formulas.append(lex.make_lexleader()+self.make_assumps(assignment, num_c, num_r, lex))
+        results = []
+        for cnf in cnfpool.default_pool().convert_many(formulas):
+            solver = solver_pool.get()
+            self.parse_dimacs(cnf.split('\n'), solver)
+            results.append(solver.solve())
+        return results
+
+    def check_lex_clauses(self, num_c, num_r, option, assignment, mode="clauses"):
+        lex = lexleader.LexLeader(num_c, num_r, option, rows_enabled=False)
+        if mode in ("tseitin", "pg"):
+            clauses = lex.make_lexleader_tseitin(pg=(mode == "pg"))
+        else:
+            clauses = lex.make_lexleader_clauses()
+        solver = solver_pool.get(lex.num_var)
+        for clause in clauses:
+            solver.add_clause(clause)
+        assumps = [lex.var(i, j) if assignment[i][j] == 1 else -lex.var(i, j)
+                   for i in range(num_c) for j in range(num_r)]
+        return solver.solve(assumps)
+
+    def check_lex_native(self, num_c, num_r, assignment):
+        lex = lexleader.LexLeader(num_c, num_r, "native", rows_enabled=False)
+        solver = solver_pool.get(lex.num_var)
+        lex.post_lexleader(solver)
+        assumps = [lex.var(i, j) if assignment[i][j] == 1 else -lex.var(i, j)
+                   for i in range(num_c) for j in range(num_r)]
+        return solver.solve(assumps)
+
     def get_cnf(self, formula):
-        pathtofile = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'bool2cnf')
-        p = Popen(pathtofile, stdout=PIPE, stdin=PIPE)
-        stdout, _ = p.communicate(input=formula.encode('utf-8'))
-        return stdout.decode("utf-8").split('\n')
+        return cnfpool.default_pool().convert(formula).split('\n')
 
     def parse_dimacs(self, f, solver):
         i = 0
         for line in f:
+            if line.startswith('c'):
+                continue  # skip the variable signature
             if line.startswith('p'):
                 tokens = line.split()
                 nvars = int(tokens[2])
@@ -139,5 +407,133 @@ class TestLexLeader(unittest.TestCase):
             i += 1
         assert i == nclauses
 
+
+class TestLexCache(unittest.TestCase):
+    def test_round_trip(self):
+        lex = lexleader.LexLeader(4, 3, "ror")
+        clauses = lex.make_lexleader_clauses()
+        var2realvar = {i: i for i in range(1, 13)}
+        with tempfile.TemporaryDirectory() as directory:
+            cache = lexcache.LexCache(directory)
+            self.assertIsNone(cache.get((4, 3, "ror", "clauses")))
+            cache.put((4, 3, "ror", "clauses"), clauses, lex.num_var, var2realvar)
+            cached, num_var, cached_map = cache.get((4, 3, "ror", "clauses"))
+            self.assertEqual(num_var, lex.num_var)
+            self.assertEqual(cached_map, var2realvar)
+            self.assertEqual([list(c) for c in cached], [list(c) for c in clauses])
+
+    def test_eviction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = lexcache.LexCache(directory, max_bytes=0)
+            lex = lexleader.LexLeader(3, 3, "and")
+            cache.put((3, 3, "and", "clauses"), lex.make_lexleader_clauses(), lex.num_var, {})
+            self.assertIsNone(cache.get((3, 3, "and", "clauses")))
+
+    def test_corrupt_entry(self):
+        lex = lexleader.LexLeader(4, 3, "ror")
+        clauses = lex.make_lexleader_clauses()
+        key = (4, 3, "ror", "clauses")
+        with tempfile.TemporaryDirectory() as directory:
+            cache = lexcache.LexCache(directory)
+            path = cache.path(key)
+            cache.put(key, clauses, lex.num_var, {})
+            full = os.path.getsize(path)
+            for size in [0, 10, 100, full - 4]:
+                cache.put(key, clauses, lex.num_var, {})
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+                # a miss that removes the entry, so it can be stored again
+                self.assertIsNone(cache.get(key))
+                self.assertFalse(os.path.exists(path))
+            cache.put(key, clauses, lex.num_var, {})
+            self.assertEqual([list(c) for c in cache.get(key)[0]], [list(c) for c in clauses])
+
+class TestSweep(unittest.TestCase):
+    def test_sweep_and_resume(self):
+        jobs = sweep.make_jobs([(7, 3, 1), (13, 4, 1)], ["harvey", "native"], [1, 0], extra_args=["--cnf", "clauses"])
+        self.assertEqual([job["instance"] for job in jobs], ["13,4,1"] * 4 + ["7,3,1"] * 4)
+        with tempfile.TemporaryDirectory() as directory:
+            store = os.path.join(directory, "results.jsonl")
+            records = sweep.sweep(jobs[2:], store, workers=2, time_limit=60)
+            self.assertEqual(len(records), 6)
+            for record in records:
+                self.assertEqual(record["status"], "complete")
+                self.assertEqual(record["designs"], 2 if record["instance"] == "13,4,1" else 1)
+                self.assertGreater(record["stats"]["solves"], 0)
+            # an interrupted sweep leaves at most a partial last line
+            with open(store, "a") as f:
+                f.write('{"instance": "13,4')
+            records = sweep.sweep(jobs, store, workers=2, time_limit=60)
+            self.assertEqual([(r["instance"], r["option"]) for r in records], [("13,4,1", "harvey")] * 2)
+            self.assertEqual(len(sweep.read_store(store)), 8)
+
+    def test_memory_limit(self):
+        job = sweep.make_jobs([(7, 3, 1)], ["harvey"], extra_args=["--cnf", "clauses"])[0]
+        self.assertEqual(sweep.run_job(job, time_limit=60, memory_limit=30)["status"], "memout")
+        self.assertEqual(sweep.run_job(job, time_limit=60, memory_limit=1024)["status"], "complete")
+
+    def test_parse_cut_off_output(self):
+        stats = ",".join(str(i) for i in range(len(sweep.STATS_FIELDS)))
+        record = sweep.parse_output("1 0.1\n2 0.2\n3 0.none," + stats + "\n", "none")
+        self.assertEqual((record["designs"], record["last_time"]), (2, 0.2))
+        self.assertEqual(record["stats"]["solves"], sweep.STATS_FIELDS.index("solves"))
+
+    def test_time_limit_in_solver(self):
+        # the first design of 25,4,1 takes minutes within a single solver
+        # call, which SIGTERM has to interrupt for the stats to be printed
+        job = sweep.make_jobs([(25, 4, 1)], ["or"], extra_args=["--cnf", "clauses", "--limit", "1"])[0]
+        record = sweep.run_job(job, time_limit=2, grace=30)
+        self.assertEqual(record["status"], "timeout")
+        self.assertEqual(record["designs"], 0)
+        self.assertGreater(record["stats"]["conflicts"], 0)
+        self.assertLess(record["time"], 15)
+
+
+class TestBibds(unittest.TestCase):
+    def test_first_k_bool2cnf(self):
+        # the matrix variables past the first k positions are not in the
+        # bool2cnf formula, but must still get solver variables
+        with tempfile.TemporaryDirectory() as directory:
+            for extra_args in [["--cnf", "clauses"], [], ["--stream"], ["--cache", directory], ["--cache", directory]]:
+                job = sweep.make_jobs([(8, 4, 3)], ["harvey"], first_ks=[6], extra_args=extra_args)[0]
+                record = sweep.run_job(job, time_limit=60)
+                self.assertEqual((record["status"], record["designs"]), ("complete", 114), extra_args)
+
+    def test_auto_with_row_option(self):
+        # native cannot be probed for the columns alone, and every encoding
+        # has the same lex-leaders
+        for cnf in ["bool2cnf", "clauses"]:
+            job = sweep.make_jobs([(8, 4, 3)], ["auto"], extra_args=["--row-option", "harvey", "--cnf", cnf])[0]
+            record = sweep.run_job(job, time_limit=60)
+            self.assertEqual((record["status"], record["designs"]), ("complete", 92), cnf)
+
+    def test_portfolio(self):
+        # the loser is interrupted in its solver and still prints its stats
+        output = subprocess.run([sys.executable, sweep.BIBDS, "--instance", "8,4,3", "--portfolio", "harvey,none", "-s"],
+                                stdout=subprocess.PIPE, universal_newlines=True, timeout=60).stdout
+        self.assertEqual(sweep.parse_output(output, "harvey")["designs"], 92)
+        self.assertIsNotNone(sweep.parse_output(output, "none")["stats"])
+
+    def test_portfolio_stops_contestants(self):
+        process = subprocess.Popen([sys.executable, sweep.BIBDS, "--instance", "25,4,1", "--portfolio", "native,or",
+                                    "--limit", "1"], stdout=subprocess.DEVNULL)
+        time.sleep(2)
+        contestants = [int(pid) for pid in subprocess.run(["pgrep", "-P", str(process.pid)], stdout=subprocess.PIPE,
+                                                          universal_newlines=True).stdout.split()]
+        self.assertEqual(len(contestants), 2)
+        process.terminate()
+        self.assertEqual(process.wait(timeout=15), 128)
+        for pid in contestants:
+            self.assertRaises(ProcessLookupError, os.kill, pid, 0)
+
+    def test_workers_stop_on_sigterm(self):
+        # the workers must not keep the terminated run (and its output pipe) alive
+        job = sweep.make_jobs([(9, 3, 2)], ["none"], extra_args=["--workers", "2"])[0]
+        record = sweep.run_job(job, time_limit=2, grace=30)
+        self.assertEqual(record["status"], "timeout")
+        self.assertGreater(record["designs"], 0)
+        self.assertGreater(record["stats"]["solves"], 0)
+        self.assertLess(record["time"], 15)
+
 if __name__ == '__main__':
     unittest.main()
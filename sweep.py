@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Run bibds.py over every instance x option x window x first-k combination.
+
+Jobs run in parallel, at most --jobs at a time, each a separate bibds.py
+process with its own wall-time and memory limit.  The largest instances are
+started first so that the long jobs do not straggle at the end of a sweep.
+
+Every finished job is appended to the results store, a file with one JSON
+record per line.  A sweep pointed at an existing store skips the jobs it
+already holds, so an interrupted sweep is resumed by running it again.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from subprocess import Popen, PIPE, DEVNULL, TimeoutExpired
+
+# the fields of the bibds.py -s stats line, after the option (see bibds.at_exit)
+STATS_FIELDS = ('bool2cnf', 'clauses', 'conflicts', 'decisions', 'get_lex', 'propagations',
+                'rnd_decisions', 'solves', 'solving', 'starts', 'total')
+BIBDS = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'bibds.py')
+# seconds a timed-out job gets to print its stats after SIGTERM before it is
+# killed; bibds.py interrupts its solver on the signal, so this is a last resort
+TERMINATE_GRACE = 5
+
+
+def read_instances(path):
+    """ the (v, k, lambda) triples of an INSTANCES file """
+    instances = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                instances.append(tuple(int(x) for x in line.split(',')))
+    return instances
+
+
+def job_size(instance):
+    """ the number of cells of the instance's incidence matrix """
+    n, k, l = instance
+    return l*n*(n-1)//(k*(k-1)) * n
+
+
+def make_jobs(instances, options, windows=(1,), first_ks=(None,), extra_args=()):
+    """ one job per combination, largest instance first; a job is a dict of
+        the instance ("v,k,lambda"), option, window, first_k and the further
+        bibds.py arguments
+    """
+    jobs = []
+    for instance in sorted(instances, key=job_size, reverse=True):
+        for option in options:
+            for window in windows:
+                for first_k in first_ks:
+                    jobs.append({"instance": ",".join(str(x) for x in instance), "option": option,
+                                 "window": window, "first_k": first_k, "args": list(extra_args)})
+    return jobs
+
+
+def job_key(job):
+    return (job["instance"], job["option"], job["window"], job["first_k"], tuple(job["args"]))
+
+
+def read_store(path):
+    """ the records of a results store; a partly written last line (from an
+        interrupted sweep) is ignored
+    """
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def parse_output(output, option):
+    """ the design count, the times of the first and last design, whether the
+        enumeration was complete and the stats of a bibds.py -s run
+    """
+    result = {"designs": 0, "first_time": None, "last_time": None, "complete": False, "stats": None}
+    for line in output.splitlines():
+        # a run terminated while printing a design line prints its stats
+        # line right after the cut-off part
+        stats = line.find(option + ",")
+        if stats > 0:
+            line = line[stats:]
+        fields = line.split()
+        if line.startswith("UNSAT"):
+            result["complete"] = True
+        elif len(fields) == 2 and fields[0].isdigit() and fields[1].replace(".", "", 1).isdigit():
+            result["designs"] = int(fields[0])
+            result["last_time"] = float(fields[1])
+            if result["first_time"] is None:
+                result["first_time"] = float(fields[1])
+        elif line.startswith(option + ","):
+            values = line[len(option)+1:].split(',')
+            if len(values) == len(STATS_FIELDS):
+                result["stats"] = dict(zip(STATS_FIELDS, (float(x) for x in values)))
+    return result
+
+
+def run_job(job, time_limit=None, memory_limit=None, grace=TERMINATE_GRACE):
+    """ run bibds.py on one job and return its record: the job, a status
+        ("complete", "limit", "timeout", "memout" or "error"), the wall time
+        and the fields of parse_output(); a job over the time limit is
+        terminated, and killed if it is still running grace seconds later
+    """
+    argv = [sys.executable, BIBDS, "--instance", job["instance"], "--option", job["option"], "-s",
+            "--window", str(job["window"])]
+    if job["first_k"] is not None:
+        argv.extend(["--first-k", str(job["first_k"])])
+    argv.extend(job["args"])
+
+    start = time.perf_counter()
+    process = Popen(argv, stdin=DEVNULL, stdout=PIPE, stderr=PIPE, universal_newlines=True)
+    if memory_limit is not None:
+        # set from here rather than with preexec_fn, which can deadlock in
+        # the forked child of a threaded process (see sweep()); the child is
+        # still starting Python at this point
+        limit = memory_limit << 20
+        try:
+            resource.prlimit(process.pid, resource.RLIMIT_AS, (limit, limit))
+        except ProcessLookupError:
+            pass  # already gone; communicate() collects it
+    timed_out = False
+    try:
+        output, errors = process.communicate(timeout=time_limit)
+    except TimeoutExpired:
+        # bibds.py prints its stats when terminated
+        timed_out = True
+        process.terminate()
+        try:
+            output, errors = process.communicate(timeout=grace)
+        except TimeoutExpired:
+            # not stopping: whatever it printed so far is kept
+            process.kill()
+            output, errors = process.communicate()
+    elapsed = time.perf_counter() - start
+
+    record = dict(job)
+    record.update(parse_output(output, job["option"]))
+    if timed_out:
+        record["status"] = "timeout"
+    elif any(error in errors for error in ("MemoryError", "bad_alloc", "OutOfMemoryException")):
+        record["status"] = "memout"
+    elif process.returncode != 0:
+        record["status"] = "error"
+        record["error"] = errors.strip().splitlines()[-1:]
+    else:
+        record["status"] = "complete" if record["complete"] else "limit"
+    record["time"] = round(elapsed, 3)
+    return record
+
+
+def sweep(jobs, store, workers=None, time_limit=None, memory_limit=None, log=None):
+    """ run the jobs that are not in the store yet, at most workers at a
+        time, appending each record to the store as it finishes
+        returns:
+            the list of new records
+    """
+    done = set(job_key(record) for record in read_store(store))
+    todo = [job for job in jobs if job_key(job) not in done]
+    if workers is None:
+        workers = os.cpu_count()
+
+    records = []
+    with open(store, "a+") as f, ThreadPoolExecutor(max_workers=workers) as pool:
+        # start on a fresh line after a partly written record
+        if f.tell() > 0:
+            f.seek(f.tell() - 1)
+            if f.read(1) != "\n":
+                f.write("\n")
+        # the pool starts jobs in submission order, which is largest first
+        futures = [pool.submit(run_job, job, time_limit, memory_limit) for job in todo]
+        for future in as_completed(futures):
+            record = future.result()
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            records.append(record)
+            if log is not None:
+                log.write("{instance} {option} window={window} first_k={first_k}: "
+                          "{status} {time}s\n".format(**record))
+    return records
+
+
+def parse_list(text, convert=str):
+    return [None if x == "none" else convert(x) for x in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--instances', type=str, default='INSTANCES',
+                        help="file of v,k,lambda lines (default: INSTANCES)")
+    parser.add_argument('--options', type=str, required=True,
+                        help="comma-separated lex-leader options")
+    parser.add_argument('--windows', type=str, default='1',
+                        help="comma-separated --window values (default: 1)")
+    parser.add_argument('--first-k', type=str, default='none',
+                        help="comma-separated --first-k values, none for no "
+                             "truncation (default: none)")
+    parser.add_argument('--store', type=str, required=True,
+                        help="results store; existing jobs in it are skipped")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="jobs to run at once (default: number of cores)")
+    parser.add_argument('--time-limit', type=float, default=None, metavar='SECONDS',
+                        help="wall-time limit per job")
+    parser.add_argument('--memory-limit', type=int, default=None, metavar='MB',
+                        help="address-space limit per job")
+    # anything else, e.g. --cnf clauses or --limit 1, is passed to bibds.py
+    args, extra_args = parser.parse_known_args()
+
+    jobs = make_jobs(read_instances(args.instances), parse_list(args.options),
+                     parse_list(args.windows, int), parse_list(args.first_k, int), extra_args)
+    sweep(jobs, args.store, args.jobs, args.time_limit, args.memory_limit, log=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()